@@ -0,0 +1,204 @@
+"""Measure the time it takes to discover, import and grok a package.
+
+Usage: python benchmarks/grok_time.py [options]
+
+A synthetic package is written to a temporary directory. Its classes
+derive from a chain of base classes and use directives, which a class
+grokker resolves. We time ``grok_dotted_name`` end to end, as well as
+its three phases separately:
+
+- discovery: listing the modules in the package,
+- import: importing them,
+- grok: grokking the imported modules.
+
+Every time is the best of a number of repeats, in seconds. Use
+``--output`` to store the results as JSON, and ``--compare`` to compare
+them to results stored earlier.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import martian
+from martian import scan
+
+
+PACKAGE = 'grokbenchpkg'
+
+
+def make_package(directory, modules, classes, depth, directives,
+                 per_package=100):
+    root = os.path.join(directory, PACKAGE)
+    os.mkdir(root)
+    open(os.path.join(root, '__init__.py'), 'w').close()
+
+    lines = ['import martian', '']
+    for i in range(directives):
+        lines.extend([
+            'class directive%d(martian.Directive):' % i,
+            '    scope = martian.CLASS',
+            '    store = martian.ONCE',
+            '    default = None',
+            ''])
+    lines.extend(['class Component0(object):',
+                  '    martian.baseclass()',
+                  ''])
+    for i in range(1, depth):
+        lines.extend(['class Component%d(Component%d):' % (i, i - 1),
+                      '    martian.baseclass()',
+                      ''])
+    with open(os.path.join(root, 'base.py'), 'w') as f:
+        f.write('\n'.join(lines))
+
+    names = ['Component%d' % (depth - 1)] + [
+        'directive%d' % i for i in range(directives)]
+    for i in range(modules):
+        package = os.path.join(root, 'sub%d' % (i // per_package))
+        if not os.path.isdir(package):
+            os.mkdir(package)
+            open(os.path.join(package, '__init__.py'), 'w').close()
+        lines = [f"from {PACKAGE}.base import {', '.join(names)}", '']
+        for j in range(classes):
+            lines.append('class Class%d(Component%d):' % (j, depth - 1))
+            for k in range(directives):
+                lines.append('    directive%d(%r)' % (k, 'value%d' % j))
+            lines.extend(['    pass', ''])
+        with open(os.path.join(package, 'module%d.py' % i), 'w') as f:
+            f.write('\n'.join(lines))
+
+
+def make_registry(directives):
+    base = importlib.import_module(PACKAGE + '.base')
+
+    class BenchGrokker(martian.ClassGrokker):
+        martian.component(base.Component0)
+        for i in range(directives):
+            martian.directive(getattr(base, 'directive%d' % i))
+        if directives:
+            del i
+
+        def execute(self, class_, **kw):
+            return True
+
+    registry = martian.GrokkerRegistry()
+    registry.register(BenchGrokker())
+    return registry
+
+
+def forget_package():
+    for name in list(sys.modules):
+        if name == PACKAGE or name.startswith(PACKAGE + '.'):
+            del sys.modules[name]
+    scan.clear_resolve_cache()
+    importlib.invalidate_caches()
+
+
+def walk(module_info):
+    yield module_info
+    for sub_module_info in module_info.getSubModuleInfos():
+        yield from walk(sub_module_info)
+
+
+def measure_phases(directives):
+    forget_package()
+    start = time.perf_counter()
+    module_infos = list(walk(scan.module_info_from_dotted_name(PACKAGE)))
+    discovered = time.perf_counter()
+    for module_info in module_infos:
+        module_info.getModule()
+    imported = time.perf_counter()
+    registry = make_registry(directives)
+    start_grok = time.perf_counter()
+    for module_info in module_infos:
+        martian.grok_module(module_info, registry)
+    grokked = time.perf_counter()
+    return {'discovery': discovered - start,
+            'import': imported - discovered,
+            'grok': grokked - start_grok}
+
+
+def measure_end_to_end(directives):
+    forget_package()
+    registry = make_registry(directives)
+    start = time.perf_counter()
+    martian.grok_dotted_name(PACKAGE, registry)
+    return time.perf_counter() - start
+
+
+def run(args):
+    results = {}
+    for i in range(args.repeat):
+        times = measure_phases(args.directives)
+        times['end_to_end'] = measure_end_to_end(args.directives)
+        for name, value in times.items():
+            results[name] = min(value, results.get(name, value))
+    return results
+
+
+def compare(results, baseline):
+    for name, value in sorted(results.items()):
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        print('%-12s %10.4fs -> %10.4fs  %+6.1f%%' % (
+            name, before, value, (value - before) / before * 100))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', type=int, default=1000)
+    parser.add_argument('--classes', type=int, default=10,
+                        help='classes per module')
+    parser.add_argument('--depth', type=int, default=3,
+                        help='number of base classes of each class')
+    parser.add_argument('--directives', type=int, default=2,
+                        help='directives used by each class')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--compare', help='compare to results in this file')
+    args = parser.parse_args()
+    if args.depth < 1:
+        parser.error('--depth must be at least 1')
+
+    tmp = tempfile.mkdtemp()
+    sys.path.insert(0, tmp)
+    try:
+        make_package(tmp, args.modules, args.classes, args.depth,
+                     args.directives)
+        results = run(args)
+    finally:
+        sys.path.remove(tmp)
+        forget_package()
+        shutil.rmtree(tmp)
+
+    for name, value in sorted(results.items()):
+        print('%-12s %10.4fs' % (name, value))
+    report = {
+        'parameters': {'modules': args.modules,
+                       'classes': args.classes,
+                       'depth': args.depth,
+                       'directives': args.directives,
+                       'repeat': args.repeat},
+        'python': platform.python_version(),
+        'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['parameters'] != report['parameters']:
+            print('warning: the baseline was made with other parameters: %r'
+                  % baseline['parameters'])
+        compare(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
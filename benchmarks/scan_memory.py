@@ -0,0 +1,58 @@
+"""Measure the memory used by the module infos of a scanned package tree.
+
+Usage: python benchmarks/scan_memory.py [number of modules]
+
+A synthetic package with the given number of modules (10000 by default)
+is written to a temporary directory and scanned without importing any of
+its modules.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+from martian import scan
+
+
+def make_package(directory, modules, per_package=100):
+    root = os.path.join(directory, 'memorypkg')
+    os.mkdir(root)
+    open(os.path.join(root, '__init__.py'), 'w').close()
+    for i in range(modules):
+        package = os.path.join(root, 'sub%d' % (i // per_package))
+        if not os.path.isdir(package):
+            os.mkdir(package)
+            open(os.path.join(package, '__init__.py'), 'w').close()
+        open(os.path.join(package, 'module%d.py' % i), 'w').close()
+    return root
+
+
+def collect(module_info, result):
+    result.append(module_info)
+    for sub_module_info in module_info.getSubModuleInfos():
+        collect(sub_module_info, result)
+    return result
+
+
+def main():
+    modules = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tmp = tempfile.mkdtemp()
+    try:
+        root = make_package(tmp, modules)
+        tracemalloc.start()
+        module_infos = collect(
+            scan.ModuleInfo(os.path.join(root, '__init__.py'), 'memorypkg'),
+            [])
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('%d module infos: %d bytes retained, %.1f bytes each '
+              '(peak %d bytes)' % (
+                  len(module_infos), current, current / len(module_infos),
+                  peak))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Recording configuration actions to apply them later
+"""
+
+from collections import namedtuple
+
+from martian.error import ConflictError
+
+
+Action = namedtuple(
+    'Action', ['discriminator', 'callable', 'args', 'kw', 'order', 'info'])
+
+
+class ActionCollector:
+    """Collects the actions grokkers want to take.
+
+    Pass an ActionCollector along when grokking (for instance as
+    ``actions``) and have grokkers call ``action()`` instead of making
+    their registrations directly. Once everything is grokked,
+    ``execute()`` checks the actions for conflicts and applies them all.
+
+    Two actions with the same discriminator conflict, unless they are
+    exactly the same, in which case only the first one is applied. An
+    action with a discriminator of None never conflicts.
+    """
+
+    def __init__(self):
+        self.actions = []
+
+    def action(self, discriminator, callable=None, args=(), kw=None,
+               order=0, info=None):
+        self.actions.append(
+            Action(discriminator, callable, tuple(args), kw or {}, order,
+                   info))
+
+    def conflicts(self):
+        """Return the conflicting actions by discriminator.
+        """
+        by_discriminator = {}
+        for action in self.actions:
+            if action.discriminator is None:
+                continue
+            by_discriminator.setdefault(action.discriminator, []).append(
+                action)
+        conflicts = {}
+        for discriminator, actions in by_discriminator.items():
+            first = actions[0]
+            if any(not _same(first, action) for action in actions[1:]):
+                conflicts[discriminator] = actions
+        return conflicts
+
+    def sorted_actions(self):
+        """Return the actions to apply, in the order to apply them in.
+
+        Actions are sorted by their order; actions with the same order
+        stay in the order in which they were recorded. Duplicate actions
+        are left out.
+        """
+        seen = set()
+        result = []
+        for action in self.actions:
+            if action.discriminator is not None:
+                if action.discriminator in seen:
+                    continue
+                seen.add(action.discriminator)
+            result.append(action)
+        result.sort(key=_action_order)
+        return result
+
+    def execute(self):
+        """Apply all actions, unless there are conflicts.
+
+        Raises a ConflictError if any actions conflict; nothing is
+        applied in that case. If an action raises an error, the actions
+        that were not applied, starting with the one that failed, are
+        left in ``actions``.
+        """
+        conflicts = self.conflicts()
+        if conflicts:
+            lines = ['Conflicting configuration actions']
+            for discriminator, actions in conflicts.items():
+                lines.append(f'  For: {discriminator!r}')
+                for action in actions:
+                    lines.append(f'    {action.info!r}')
+            raise ConflictError('\n'.join(lines), conflicts)
+        actions = self.sorted_actions()
+        for i, action in enumerate(actions):
+            if action.callable is None:
+                continue
+            try:
+                action.callable(*action.args, **action.kw)
+            except BaseException:
+                self.actions = actions[i:]
+                raise
+        self.actions = []
+
+
+def _action_order(action):
+    return action.order
+
+
+def _same(a, b):
+    return (a.callable == b.callable and a.args == b.args and
+            a.kw == b.kw)
@@ -12,6 +12,9 @@
 #
 ##############################################################################
 
+import weakref
+from functools import partial
+
 from zope.interface import implementer
 
 from martian import util
@@ -43,6 +46,15 @@ class ClassGrokker(GrokkerBase):
     """
 
     def grok(self, name, class_, module_info=None, **kw):
+        return self.analyze(name, class_, module_info=module_info, **kw)()
+
+    def analyze(self, name, class_, module_info=None, **kw):
+        """Resolve the directives for class_.
+
+        Returns a callable that executes the grokker with the result.
+        Analyzing does not have side effects of its own, so it may be
+        done ahead of time and in another thread.
+        """
         module = None
         if module_info is not None:
             module = module_info.getModule()
@@ -50,15 +62,56 @@ class ClassGrokker(GrokkerBase):
         # Populate the data dict with information from the directives:
         for d in directive.bind().get(self.__class__):
             kw[d.name] = d.get(class_, module, **kw)
-        return self.execute(class_, **kw)
+        return partial(self.execute, class_, **kw)
 
     def execute(self, class_, **data):
         raise NotImplementedError
 
 
+# The names of the public methods of the classes seen by method
+# grokkers. We remember names rather than the methods themselves, as
+# classmethods would keep their class alive.
+_public_method_names = weakref.WeakKeyDictionary()
+
+
+def _public_methods(class_):
+    try:
+        names = _public_method_names.get(class_)
+    except TypeError:
+        # cannot be referred to weakly, so we do not remember it
+        return [method for name, method in util.methods_by_name(class_)
+                if not method.__name__.startswith('_')]
+    if names is None:
+        methods = [(name, method)
+                   for name, method in util.methods_by_name(class_)
+                   if not method.__name__.startswith('_')]
+        _public_method_names[class_] = tuple(name for name, m in methods)
+        return [method for name, method in methods]
+    try:
+        return [getattr(class_, name) for name in names]
+    except AttributeError:
+        # a method was removed from the class since, look again
+        _public_method_names.pop(class_, None)
+        return _public_methods(class_)
+
+
 class MethodGrokker(ClassGrokker):
 
-    def grok(self, name, class_, module_info=None, **kw):
+    # the methods of the component, which are ignored
+    _basemethods = None
+
+    def _base_methods(self):
+        basemethods = self._basemethods
+        if basemethods is None:
+            base = component.bind().get(self.__class__)
+            if base is None:
+                basemethods = frozenset()
+            else:
+                basemethods = frozenset(_public_methods(base))
+            self._basemethods = basemethods
+        return basemethods
+
+    def analyze(self, name, class_, module_info=None, **kw):
         module = None
         if module_info is not None:
             module = module_info.getModule()
@@ -69,15 +122,15 @@ class MethodGrokker(ClassGrokker):
             kw[d.name] = d.get(class_, module, **kw)
 
         # Ignore methods that are present on the component baseclass.
-        basemethods = set(util.public_methods_from_class(
-            component.bind().get(self.__class__)))
-        methods = set(util.public_methods_from_class(class_)) - basemethods
+        basemethods = self._base_methods()
+        methods = [method for method in _public_methods(class_)
+                   if method not in basemethods]
         if not methods:
             raise GrokError("%r does not define any public methods. "
                             "Please add methods to this class to enable "
                             "its registration." % class_, class_)
 
-        results = []
+        method_data = []
         for method in methods:
             # Directives may also be applied to methods, so let's
             # check each directive and potentially override the
@@ -88,9 +141,13 @@ class MethodGrokker(ClassGrokker):
                 class_value = data[bound_dir.name]
                 data[bound_dir.name] = d.store.get(d, method,
                                                    default=class_value)
-            results.append(self.execute(class_, method, **data))
+            method_data.append((method, data))
 
-        return max(results)
+        def execute_methods():
+            results = [self.execute(class_, method, **data)
+                       for method, data in method_data]
+            return max(results)
+        return execute_methods
 
     def execute(self, class_, method, **data):
         raise NotImplementedError
@@ -0,0 +1,122 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Grokking in an asyncio event loop without blocking it
+"""
+
+import asyncio
+from time import perf_counter
+
+from martian import events
+from martian import scan
+
+
+class Progress:
+    """How far grokking a package got.
+
+    ``modules`` and ``objects`` count the modules that were grokked and
+    the objects grokkers were executed for. ``current`` is the dotted
+    name of the module being grokked, and ``done`` is set once all of
+    the package was grokked.
+    """
+
+    def __init__(self):
+        self.modules = 0
+        self.objects = 0
+        self.current = None
+        self.done = False
+
+    def __repr__(self):
+        return '<Progress modules=%d objects=%d done=%r>' % (
+            self.modules, self.objects, self.done)
+
+
+class _Slicer:
+    """Decide when to give the event loop a turn."""
+
+    def __init__(self, time_slice, objects):
+        self.time_slice = time_slice
+        self.objects = objects
+        self._reset()
+
+    def _reset(self):
+        self._deadline = perf_counter() + self.time_slice
+        self._count = 0
+
+    async def step(self, objects=1):
+        self._count += objects
+        if ((self.objects is not None and self._count >= self.objects) or
+                perf_counter() >= self._deadline):
+            await asyncio.sleep(0)
+            self._reset()
+
+
+async def grok_dotted_name(dotted_name, grokker, exclude_filter=None,
+                           ignore_nonsource=True, manifest=None,
+                           prescanner=None, time_slice=0.01, objects=None,
+                           progress=None, **kw):
+    """Like ``martian.grok_dotted_name``, but give the event loop turns."""
+    module_info = scan.module_info_from_dotted_name(
+        dotted_name, exclude_filter, ignore_nonsource, manifest)
+    await grok_package(module_info, grokker, prescanner=prescanner,
+                       time_slice=time_slice, objects=objects,
+                       progress=progress, **kw)
+
+
+async def grok_package(module_info, grokker, prescanner=None,
+                       time_slice=0.01, objects=None, progress=None, **kw):
+    """Like ``martian.grok_package``, but give the event loop turns.
+
+    The modules are grokked in the same order and in the same way as
+    ``grok_package`` does, in the thread that runs the event loop. Every
+    time_slice seconds, and after every objects objects if that is
+    given, we let the event loop run other tasks. With a grokker that
+    groks step by step, such as a ``ModuleGrokker``, this may happen in
+    the middle of a module; otherwise it happens between modules.
+    Importing a module is never interrupted.
+
+    Pass a ``Progress`` to follow how far grokking got.
+    """
+    if progress is None:
+        progress = Progress()
+    slicer = _Slicer(time_slice, objects)
+    module_infos = scan.iter_module_infos(module_info)
+    if prescanner is not None:
+        module_infos = prescanner.filter(module_infos, grokker)
+    iter_grok = getattr(grokker, 'iter_grok', None)
+    for sub_module_info in module_infos:
+        dotted_name = progress.current = sub_module_info.dotted_name
+        module = sub_module_info.getModule()
+        # the same module events as grok_module() sends; the duration
+        # includes the turns other tasks got in the meantime
+        observed = bool(events.subscribers)
+        if observed:
+            events.notify(events.ModuleStart(dotted_name))
+            start = perf_counter()
+        try:
+            if iter_grok is None:
+                grokker.grok(dotted_name, module,
+                             module_info=sub_module_info, **kw)
+            else:
+                for step in iter_grok(dotted_name, module,
+                                      module_info=sub_module_info, **kw):
+                    progress.objects += 1
+                    await slicer.step()
+        finally:
+            if observed:
+                events.notify(events.ModuleEnd(
+                    dotted_name, perf_counter() - start))
+        progress.modules += 1
+        await slicer.step(0)
+    progress.current = None
+    progress.done = True
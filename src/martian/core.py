@@ -1,8 +1,16 @@
+import copy
 import inspect
+import threading
 import types
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
 
 from zope.interface import implementer
 
+from martian import events
 from martian import scan
 from martian import util
 from martian.components import ClassGrokker
@@ -21,11 +29,23 @@ class MultiGrokkerBase(GrokkerBase):
     def register(self, grokker):
         raise NotImplementedError
 
+    def unregister(self, grokker):
+        raise NotImplementedError
+
+    def unregister_module(self, dotted_name):
+        raise NotImplementedError
+
     def grok(self, name, obj, **kw):
         grokked_status = False
 
+        observed = bool(events.subscribers)
         for g, name, obj in self.grokkers(name, obj):
+            if observed:
+                start = perf_counter()
             grokked = g.grok(name, obj, **kw)
+            if observed:
+                events.notify(events.GrokkerExecuted(
+                    g, name, obj, perf_counter() - start, grokked))
             if grokked not in (True, False):
                 raise GrokError(
                     "%r returns %r instead of True or False." %
@@ -42,15 +62,43 @@ class MultiGrokkerBase(GrokkerBase):
         raise NotImplementedError
 
 
-def _grokker_sort_key(args):
-    """Helper function to calculate sort order of grokker.
+def _reraise(exception):
+    raise exception
+
+
+def _prioritized(grokkers):
+    """Turn a grokkers() method into a prioritized_grokkers() one.
+
+    This is used for multi grokkers that do not know the priorities of
+    their grokkers themselves.
     """
-    grokker, name, obj = args
-    return priority.bind().get(grokker)
+    priorities = {}
+
+    def prioritized_grokkers(name, obj):
+        for g, name, obj in grokkers(name, obj):
+            try:
+                grokker_priority = priorities[g.__class__]
+            except KeyError:
+                grokker_priority = priorities[g.__class__] = \
+                    priority.bind().get(g)
+            yield grokker_priority, g, name, obj
+    return prioritized_grokkers
 
 
 class ModuleGrokker(MultiGrokkerBase):
 
+    # Set this to a dictionary to record, per module dotted name, the
+    # ``(grokker, name, obj)`` triples that were successfully grokked.
+    provenance = None
+
+    # Set this to True to only grok the names listed in a module's
+    # ``__all__``, if it has one.
+    use_all = False
+
+    # Set this to a ``martian.snapshot.Snapshot`` to record what the
+    # grokkers did, so that it can be replayed later.
+    recorder = None
+
     def __init__(self, grokker=None, prepare=None, finalize=None):
         if grokker is None:
             grokker = MultiGrokker()
@@ -61,29 +109,153 @@ class ModuleGrokker(MultiGrokkerBase):
     def register(self, grokker):
         self._grokker.register(grokker)
 
+    def unregister(self, grokker):
+        self._grokker.unregister(grokker)
+
     def clear(self):
         self._grokker.clear()
+        _grokked_modules.pop(self, None)
+
+    def unregister_module(self, dotted_name):
+        """Forget about the module dotted_name, or the package.
+
+        The grokkers defined in it are unregistered, and what was grokked
+        from it is no longer remembered in the provenance, nor by
+        ``grok_dotted_names()``.
+        """
+        self._grokker.unregister_module(dotted_name)
+        if self.provenance is not None:
+            for name in list(self.provenance):
+                if name == dotted_name or name.startswith(dotted_name + '.'):
+                    del self.provenance[name]
+        grokked = _grokked_modules.get(self)
+        if grokked:
+            grokked.difference_update(
+                [name for name in grokked
+                 if _matches(name, (dotted_name,))])
+
+    def find(self, grokker_class):
+        return self._grokker.find(grokker_class)
+
+    def grokker_classes(self):
+        grokker_classes = getattr(self._grokker, 'grokker_classes', None)
+        if grokker_classes is None:
+            return None
+        return grokker_classes()
+
+    def components(self):
+        if self.prepare is not None or self.finalize is not None:
+            # these need to see every module
+            return None
+        components = getattr(self._grokker, 'components', None)
+        if components is None:
+            return None
+        return components()
 
     def grok(self, name, module, **kw):
+        return self._grok(name, module, None, kw)
+
+    def analyze(self, name, module, **kw):
+        """Analyze the objects in module ahead of grokking it.
+
+        The class grokkers that resolve their directives in ``analyze()``
+        are analyzed; the result can be passed to ``grok_analyzed()``.
+        Analyzing has no side effects, so it may be done in another
+        thread.
+        """
+        analysis = {}
+        if self.prepare is not None:
+            # prepare may change what the grokkers get to see
+            return analysis
+        for grokker_priority, g, obj_name, obj in \
+                self.prioritized_grokkers(name, module):
+            if type(g).grok is not ClassGrokker.grok:
+                # this grokker does everything in grok()
+                continue
+            try:
+                execute = g.analyze(obj_name, obj, **kw)
+            except Exception as e:
+                # report the error when the grokker gets to run
+                execute = partial(_reraise, e)
+            analysis[(g, obj_name)] = (obj, execute)
+        return analysis
+
+    def grok_analyzed(self, name, module, analysis, **kw):
+        """Grok module, using the result of ``analyze()``.
+
+        Grokkers that were not analyzed, for instance because they were
+        registered after the analysis was made, are run as usual.
+        """
+        return self._grok(name, module, analysis, kw)
+
+    def iter_grok(self, name, module, **kw):
+        """Grok module step by step.
+
+        This is a generator that yields after every object a grokker was
+        executed for, so the caller can do other work in between. It
+        returns the same as ``grok()`` when it is exhausted.
+        """
+        return self._iter_grok(name, module, None, kw)
+
+    def _grok(self, name, module, analysis, kw):
+        steps = self._iter_grok(name, module, analysis, kw)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    def _iter_grok(self, name, module, analysis, kw):
         grokked_status = False
+        observed = bool(events.subscribers)
+        if self.provenance is not None:
+            grokked_record = self.provenance.setdefault(name, [])
 
         # prepare module grok - this can also influence the kw dictionary
         if self.prepare is not None:
             self.prepare(name, module, kw)
 
-        # sort grokkers by priority
-        grokkers = sorted(self.grokkers(name, module),
-                          key=_grokker_sort_key,
-                          reverse=True)
-
-        for g, name, obj in grokkers:
-            grokked = g.grok(name, obj, **kw)
-            if grokked not in (True, False):
-                raise GrokError(
-                    "%r returns %r instead of True or False." %
-                    (g, grokked), None)
-            if grokked:
-                grokked_status = True
+        # Bucket the grokkers by priority. Within a priority the grokkers
+        # are executed in the order in which they were found.
+        buckets = {}
+        for grokker_priority, g, obj_name, obj in \
+                self.prioritized_grokkers(name, module):
+            bucket = buckets.get(grokker_priority)
+            if bucket is None:
+                bucket = buckets[grokker_priority] = []
+            bucket.append((g, obj_name, obj))
+
+        for grokker_priority in sorted(buckets, reverse=True):
+            for g, obj_name, obj in buckets[grokker_priority]:
+                execute = None
+                if analysis is not None:
+                    analyzed = analysis.get((g, obj_name))
+                    if analyzed is not None and analyzed[0] is obj:
+                        execute = analyzed[1]
+                if (execute is None and self.recorder is not None and
+                        type(g).grok is ClassGrokker.grok):
+                    # the recorder wants to see the resolved directives
+                    execute = g.analyze(obj_name, obj, **kw)
+                if observed:
+                    start = perf_counter()
+                if execute is not None:
+                    grokked = execute()
+                else:
+                    grokked = g.grok(obj_name, obj, **kw)
+                if observed:
+                    events.notify(events.GrokkerExecuted(
+                        g, obj_name, obj, perf_counter() - start, grokked))
+                if grokked not in (True, False):
+                    raise GrokError(
+                        "%r returns %r instead of True or False." %
+                        (g, grokked), None)
+                if grokked:
+                    grokked_status = True
+                    if self.provenance is not None:
+                        grokked_record.append((g, obj_name, obj))
+                    if self.recorder is not None:
+                        self.recorder.record(name, g, obj_name, obj, execute)
+                yield
 
         # finalize module grok
         if self.finalize is not None:
@@ -95,60 +267,232 @@ class ModuleGrokker(MultiGrokkerBase):
         grokker = self._grokker
         # get any global grokkers
         yield from grokker.grokkers(name, module)
+        for obj_name, obj in self._contents(module):
+            yield from grokker.grokkers(obj_name, obj)
 
+    def prioritized_grokkers(self, name, module):
+        """Like grokkers(), but yields ``(priority, grokker, name, obj)``.
+        """
+        if type(self).grokkers is not ModuleGrokker.grokkers:
+            # a subclass decides what gets grokked
+            yield from _prioritized(self.grokkers)(name, module)
+            return
+        prioritized_grokkers = getattr(
+            self._grokker, 'prioritized_grokkers', None)
+        if prioritized_grokkers is None:
+            prioritized_grokkers = _prioritized(self._grokker.grokkers)
+        yield from prioritized_grokkers(name, module)
+        for obj_name, obj in self._contents(module):
+            yield from prioritized_grokkers(obj_name, obj)
+
+    def _contents(self, module):
         ignores = getattr(module, 'martian.martiandirective.ignore', [])
 
         # try to grok everything in module
-        for name in dir(module):
-            if '.' in name or name in ignores:
-                # This must be a module-level variable that couldn't
-                # have been set by the developer.  It must have been a
-                # module-level directive.
-                continue
-            obj = getattr(module, name)
-            if not util.defined_locally(obj, module.__name__):
+        for name, obj in util.module_contents(module, use_all=self.use_all):
+            if name in ignores:
                 continue
             if util.is_baseclass(obj):
                 continue
-            yield from grokker.grokkers(name, obj)
+            yield name, obj
+
+
+def _defined_in(grokker_class, dotted_name):
+    module_name = grokker_class.__module__
+    return (module_name == dotted_name or
+            module_name.startswith(dotted_name + '.'))
+
+
+def _forget(cache, key_id, ref):
+    # called when a key of a dispatch cache is garbage collected
+    entry = cache.get(key_id)
+    if entry is not None and entry[0] is ref:
+        cache.pop(key_id, None)
+
+
+class _Components:
+    """Map components to grokkers, referring weakly to the components.
+
+    Components that cannot be referred to weakly, such as None for
+    grokkers without a component, are held strongly instead.
+    """
+
+    def __init__(self, other=None):
+        if other is None:
+            self._weak = weakref.WeakKeyDictionary()
+            self._strong = {}
+        else:
+            self._weak = weakref.WeakKeyDictionary(other._weak)
+            self._strong = dict(other._strong)
+
+    def _mapping(self, key):
+        try:
+            weakref.ref(key)
+        except TypeError:
+            return self._strong
+        return self._weak
+
+    def get(self, key, default=None):
+        try:
+            return self._mapping(key).get(key, default)
+        except TypeError:
+            # unhashable, so it cannot be a component
+            return default
+
+    def __getitem__(self, key):
+        return self._mapping(key)[key]
+
+    def __setitem__(self, key, value):
+        self._mapping(key)[key] = value
+
+    def __delitem__(self, key):
+        del self._mapping(key)[key]
+
+    def __iter__(self):
+        yield from list(self._weak)
+        yield from list(self._strong)
 
 
 class MultiInstanceOrClassGrokkerBase(MultiGrokkerBase):
 
+    # The registry is copied on write: registering and unregistering
+    # build a new dictionary under a lock and swap it in, so that readers
+    # in other threads see a consistent registry without locking. The
+    # dispatch cache is replaced after the registry, so a result computed
+    # from an old registry can only end up in an old cache.
+    #
+    # Components and the keys of the dispatch cache are referred to
+    # weakly where possible, so classes that are no longer used can go
+    # away. The grokkers themselves are held until they are unregistered.
+
     def __init__(self):
+        self._lock = threading.Lock()
         self.clear()
 
     def register(self, grokker):
         key = component.bind().get(grokker)
-        grokkers = self._grokkers.setdefault(key, [])
-        for g in grokkers:
-            if g.__class__ is grokker.__class__:
+        grokker_priority = priority.bind().get(grokker)
+        with self._lock:
+            if grokker.__class__ in self._registered:
+                return
+            registered = dict(self._registered)
+            registered[grokker.__class__] = key
+            grokkers = _Components(self._grokkers)
+            # the priority of each grokker is determined when it is
+            # registered
+            grokkers[key] = grokkers.get(key, ()) + (
+                (grokker_priority, grokker),)
+            self._swap(registered, grokkers)
+
+    def unregister(self, grokker):
+        grokker_class = grokker.__class__
+        self._remove(lambda g_class: g_class is grokker_class)
+
+    def unregister_module(self, dotted_name):
+        self._remove(lambda g_class: _defined_in(g_class, dotted_name))
+
+    def _remove(self, should_remove):
+        with self._lock:
+            removed = [g_class for g_class in self._registered
+                       if should_remove(g_class)]
+            if not removed:
                 return
-        grokkers.append(grokker)
+            registered = dict(self._registered)
+            grokkers = _Components(self._grokkers)
+            for g_class in removed:
+                key = registered.pop(g_class)
+                remaining = tuple(
+                    (g_priority, g) for g_priority, g in grokkers[key]
+                    if g.__class__ is not g_class)
+                if remaining:
+                    grokkers[key] = remaining
+                else:
+                    del grokkers[key]
+            self._swap(registered, grokkers)
+
+    def _swap(self, registered, grokkers):
+        # maps each registered grokker class to its component
+        self._registered = registered
+        # maps components to ``(priority, grokker)`` tuples
+        self._grokkers = grokkers
+        # maps the id of the dispatch key of an object to a weak reference
+        # to the key and the grokkers that apply to it; an empty tuple
+        # means no grokker applies
+        self._dispatch_cache = {}
 
     def clear(self):
-        self._grokkers = {}
+        with self._lock:
+            self._swap({}, _Components())
+
+    def find(self, grokker_class):
+        registered = self._registered
+        if grokker_class not in registered:
+            return None
+        key = registered[grokker_class]
+        for g_priority, g in self._grokkers.get(key, ()):
+            if g.__class__ is grokker_class:
+                return g
+        return None
+
+    def grokker_classes(self):
+        return list(self._registered)
+
+    def components(self):
+        return list(self._grokkers)
 
     def grokkers(self, name, obj):
+        for grokker_priority, grokker in self._dispatch(obj):
+            yield grokker, name, obj
+
+    def prioritized_grokkers(self, name, obj):
+        for grokker_priority, grokker in self._dispatch(obj):
+            yield grokker_priority, grokker, name, obj
+
+    def _dispatch(self, obj):
+        key = self.get_dispatch_key(obj)
+        key_id = id(key)
+        cache = self._dispatch_cache
+        entry = cache.get(key_id)
+        if entry is not None and entry[0]() is key:
+            return entry[1]
+        grokkers = self._find_grokkers(obj)
+        try:
+            ref = weakref.ref(key, partial(_forget, cache, key_id))
+        except TypeError:
+            # we cannot refer to this one weakly, so we do not cache it
+            return grokkers
+        cache[key_id] = (ref, grokkers)
+        return grokkers
+
+    def _find_grokkers(self, obj):
+        registry = self._grokkers
+        result = []
         used_grokkers = set()
         for base in self.get_bases(obj):
-            grokkers = self._grokkers.get(base)
-            if grokkers is None:
+            entries = registry.get(base)
+            if entries is None:
                 continue
-            for grokker in grokkers:
-                if grokker not in used_grokkers:
-                    yield grokker, name, obj
-                    used_grokkers.add(grokker)
+            for entry in entries:
+                if entry[1] not in used_grokkers:
+                    result.append(entry)
+                    used_grokkers.add(entry[1])
+        return tuple(result)
 
 
 class MultiInstanceGrokker(MultiInstanceOrClassGrokkerBase):
 
+    def get_dispatch_key(self, obj):
+        return obj.__class__
+
     def get_bases(self, obj):
         return inspect.getmro(obj.__class__)
 
 
 class MultiClassGrokker(MultiInstanceOrClassGrokkerBase):
 
+    def get_dispatch_key(self, obj):
+        return obj
+
     def get_bases(self, obj):
         if isinstance(obj, types.ModuleType):
             return []
@@ -157,22 +501,62 @@ class MultiClassGrokker(MultiInstanceOrClassGrokkerBase):
 
 class MultiGlobalGrokker(MultiGrokkerBase):
 
+    # Like the instance and class grokkers, this is copied on write.
+
     def __init__(self):
+        self._lock = threading.Lock()
         self.clear()
 
     def register(self, grokker):
-        for g in self._grokkers:
-            if grokker.__class__ is g.__class__:
+        grokker_priority = priority.bind().get(grokker)
+        with self._lock:
+            if grokker.__class__ in self._registered:
+                return
+            registered = dict(self._registered)
+            registered[grokker.__class__] = grokker
+            self._registered = registered
+            self._grokkers += ((grokker_priority, grokker),)
+
+    def unregister(self, grokker):
+        grokker_class = grokker.__class__
+        self._remove(lambda g_class: g_class is grokker_class)
+
+    def unregister_module(self, dotted_name):
+        self._remove(lambda g_class: _defined_in(g_class, dotted_name))
+
+    def _remove(self, should_remove):
+        with self._lock:
+            if not any(should_remove(g_class)
+                       for g_class in self._registered):
                 return
-        self._grokkers.append(grokker)
+            self._grokkers = tuple(
+                (g_priority, g) for g_priority, g in self._grokkers
+                if not should_remove(g.__class__))
+            self._registered = {
+                g_class: g for g_class, g in self._registered.items()
+                if not should_remove(g_class)}
 
     def clear(self):
-        self._grokkers = []
+        with self._lock:
+            # ``(priority, grokker)`` tuples, in order of registration
+            self._grokkers = ()
+            # maps each registered grokker class to its grokker
+            self._registered = {}
+
+    def find(self, grokker_class):
+        return self._registered.get(grokker_class)
+
+    def grokker_classes(self):
+        return list(self._registered)
 
     def grokkers(self, name, module):
-        for grokker in self._grokkers:
+        for grokker_priority, grokker in self._grokkers:
             yield grokker, name, module
 
+    def prioritized_grokkers(self, name, module):
+        for grokker_priority, grokker in self._grokkers:
+            yield grokker_priority, grokker, name, module
+
 
 class MultiGrokker(MultiGrokkerBase):
 
@@ -189,10 +573,64 @@ class MultiGrokker(MultiGrokkerBase):
         else:
             assert 0, "Unknown type of grokker: %r" % grokker
 
+    def unregister(self, grokker):
+        if isinstance(grokker, InstanceGrokker):
+            self._multi_instance_grokker.unregister(grokker)
+        elif isinstance(grokker, ClassGrokker):
+            self._multi_class_grokker.unregister(grokker)
+        elif isinstance(grokker, GlobalGrokker):
+            self._multi_global_grokker.unregister(grokker)
+        else:
+            assert 0, "Unknown type of grokker: %r" % grokker
+
+    def unregister_module(self, dotted_name):
+        """Unregister the grokkers defined in the module dotted_name.
+
+        If dotted_name is a package, the grokkers defined in its sub
+        modules are unregistered as well.
+        """
+        self._multi_instance_grokker.unregister_module(dotted_name)
+        self._multi_class_grokker.unregister_module(dotted_name)
+        self._multi_global_grokker.unregister_module(dotted_name)
+
     def clear(self):
-        self._multi_instance_grokker = MultiInstanceGrokker()
-        self._multi_class_grokker = MultiClassGrokker()
-        self._multi_global_grokker = MultiGlobalGrokker()
+        self._install(MultiInstanceGrokker(), MultiClassGrokker(),
+                      MultiGlobalGrokker())
+
+    def _install(self, instance_grokker, class_grokker, global_grokker):
+        # Each kind of grokker is swapped in as a whole, so a thread that
+        # is grokking sees either the old or the new registry for it.
+        self._multi_instance_grokker = instance_grokker
+        self._multi_class_grokker = class_grokker
+        self._multi_global_grokker = global_grokker
+
+    def find(self, grokker_class):
+        """Return the registered grokker of grokker_class, or None."""
+        for grokker in (self._multi_class_grokker,
+                        self._multi_instance_grokker,
+                        self._multi_global_grokker):
+            g = grokker.find(grokker_class)
+            if g is not None:
+                return g
+        return None
+
+    def grokker_classes(self):
+        """The classes of the registered grokkers."""
+        return (self._multi_class_grokker.grokker_classes() +
+                self._multi_instance_grokker.grokker_classes() +
+                self._multi_global_grokker.grokker_classes())
+
+    def components(self):
+        """Components looked for by the registered grokkers.
+
+        Returns a ``(classes, instances)`` tuple with the components of
+        the class and instance grokkers, or None if there are global
+        grokkers, as these need to see every module.
+        """
+        if self._multi_global_grokker._grokkers:
+            return None
+        return (self._multi_class_grokker.components(),
+                self._multi_instance_grokker.components())
 
     def grokkers(self, name, obj):
         if isinstance(obj, type):
@@ -202,35 +640,311 @@ class MultiGrokker(MultiGrokkerBase):
         else:
             return self._multi_instance_grokker.grokkers(name, obj)
 
+    def prioritized_grokkers(self, name, obj):
+        if isinstance(obj, type):
+            grokker = self._multi_class_grokker
+        elif isinstance(obj, types.ModuleType):
+            grokker = self._multi_global_grokker
+        else:
+            grokker = self._multi_instance_grokker
+        return grokker.prioritized_grokkers(name, obj)
+
 
 class MetaMultiGrokker(MultiGrokker):
     """Multi grokker which comes pre-registered with meta-grokkers.
     """
 
     def clear(self):
-        super().clear()
-        # bootstrap the meta-grokkers
-        self.register(ClassMetaGrokker(self))
-        self.register(InstanceMetaGrokker(self))
-        self.register(GlobalMetaGrokker(self))
+        # bootstrap the meta-grokkers before the registry is swapped in,
+        # so other threads never see it without them
+        class_grokker = MultiClassGrokker()
+        class_grokker.register(ClassMetaGrokker(self))
+        class_grokker.register(InstanceMetaGrokker(self))
+        class_grokker.register(GlobalMetaGrokker(self))
+        self._install(MultiInstanceGrokker(), class_grokker,
+                      MultiGlobalGrokker())
+
+
+def _matches(dotted_name, prefixes):
+    for prefix in prefixes:
+        if dotted_name == prefix or dotted_name.startswith(prefix + '.'):
+            return True
+    return False
+
+
+class GrokProfile:
+    """Which part of a package to grok, and with which grokkers.
+
+    Modules are grokked if their dotted name is, or is in, one of the
+    include prefixes, if any are given, and not in one of the exclude
+    prefixes. Packages that cannot contain anything to grok are not
+    walked into, so their modules are not even imported.
+
+    If grokkers are given, only grokkers that are instances of one of
+    these classes are executed; grokkers that are instances of one of
+    exclude_grokkers never are. Meta grokkers are always executed, so
+    that the grokkers defined in the package get registered.
+    """
+
+    def __init__(self, name=None, include=(), exclude=(), grokkers=(),
+                 exclude_grokkers=()):
+        self.name = name
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.grokkers = tuple(grokkers)
+        self.exclude_grokkers = tuple(exclude_grokkers)
+
+    def __repr__(self):
+        return '<GrokProfile %r>' % self.name
+
+    def covers(self, dotted_name):
+        """Tell whether the module dotted_name is to be grokked."""
+        if _matches(dotted_name, self.exclude):
+            return False
+        return not self.include or _matches(dotted_name, self.include)
+
+    def prunes(self, module_info):
+        """Tell whether nothing in module_info is to be grokked."""
+        dotted_name = module_info.dotted_name
+        if self.covers(dotted_name):
+            return False
+        if _matches(dotted_name, self.exclude):
+            return True
+        # the package may still contain an included one
+        return not any(prefix.startswith(dotted_name + '.')
+                       for prefix in self.include)
+
+    def allows(self, grokker):
+        """Tell whether grokker is to be executed."""
+        if isinstance(grokker, MetaGrokker):
+            return True
+        if self.exclude_grokkers and isinstance(
+                grokker, self.exclude_grokkers):
+            return False
+        return not self.grokkers or isinstance(grokker, self.grokkers)
+
+    def restrict(self, grokker):
+        """Return a grokker that only executes the allowed grokkers.
+
+        Grokkers that are registered with the restricted grokker end up
+        in grokker itself.
+        """
+        if not self.grokkers and not self.exclude_grokkers:
+            return grokker
+        if isinstance(grokker, ModuleGrokker):
+            restricted = copy.copy(grokker)
+            restricted._grokker = _ProfiledGrokker(grokker._grokker, self)
+            return restricted
+        return _ProfiledGrokker(grokker, self)
+
+
+class _ProfiledGrokker(MultiGrokkerBase):
+    """A multi grokker that only yields the grokkers a profile allows."""
+
+    def __init__(self, grokker, profile):
+        self._grokker = grokker
+        self._profile = profile
+
+    def register(self, grokker):
+        self._grokker.register(grokker)
+
+    def unregister(self, grokker):
+        self._grokker.unregister(grokker)
+
+    def unregister_module(self, dotted_name):
+        self._grokker.unregister_module(dotted_name)
+
+    def clear(self):
+        self._grokker.clear()
+
+    def find(self, grokker_class):
+        return self._grokker.find(grokker_class)
+
+    def grokker_classes(self):
+        grokker_classes = getattr(self._grokker, 'grokker_classes', None)
+        if grokker_classes is None:
+            return None
+        return grokker_classes()
+
+    def components(self):
+        components = getattr(self._grokker, 'components', None)
+        if components is None:
+            return None
+        return components()
+
+    def grokkers(self, name, obj):
+        allows = self._profile.allows
+        for g, name, obj in self._grokker.grokkers(name, obj):
+            if allows(g):
+                yield g, name, obj
+
+    def prioritized_grokkers(self, name, obj):
+        prioritized_grokkers = getattr(
+            self._grokker, 'prioritized_grokkers', None)
+        if prioritized_grokkers is None:
+            prioritized_grokkers = _prioritized(self._grokker.grokkers)
+        allows = self._profile.allows
+        for grokker_priority, g, name, obj in prioritized_grokkers(name, obj):
+            if allows(g):
+                yield grokker_priority, g, name, obj
 
 
 def grok_dotted_name(dotted_name, grokker, exclude_filter=None,
-                     ignore_nonsource=True, **kw):
+                     ignore_nonsource=True, manifest=None,
+                     discovery_workers=None, prescanner=None,
+                     grok_workers=None, profile=None, **kw):
     module_info = scan.module_info_from_dotted_name(
-        dotted_name, exclude_filter, ignore_nonsource)
-    grok_package(module_info, grokker, **kw)
+        dotted_name, exclude_filter, ignore_nonsource, manifest)
+    grok_package(module_info, grokker, discovery_workers=discovery_workers,
+                 prescanner=prescanner, grok_workers=grok_workers,
+                 profile=profile, **kw)
+
 
+def grok_package(module_info, grokker, discovery_workers=None,
+                 prescanner=None, grok_workers=None, profile=None, **kw):
+    for sub_module_info in iter_grok_package(
+            module_info, grokker, discovery_workers=discovery_workers,
+            prescanner=prescanner, grok_workers=grok_workers,
+            profile=profile, **kw):
+        pass
 
-def grok_package(module_info, grokker, **kw):
-    grok_module(module_info, grokker, **kw)
-    for sub_module_info in module_info.getSubModuleInfos():
-        grok_package(sub_module_info, grokker, **kw)
+
+def iter_grok_package(module_info, grokker, discovery_workers=None,
+                      prescanner=None, grok_workers=None, profile=None,
+                      **kw):
+    """Grok a package module by module, as its modules are found.
+
+    Returns an iterator that yields the module info of every module once
+    it has been grokked. Nothing is grokked beyond what was consumed, so
+    stopping the iteration stops grokking.
+
+    If a ``GrokProfile`` is given, only the modules and grokkers it
+    selects are grokked.
+    """
+    # with discovery workers, sub packages are listed in a thread pool,
+    # but the modules are still grokked in depth-first order
+    prune = profile.prunes if profile is not None else None
+    module_infos = scan.iter_module_infos(
+        module_info, discovery_workers, prune=prune)
+    return _grok_module_infos(
+        module_infos, grokker, prescanner, grok_workers, profile, kw)
+
+
+# grokker -> the dotted names of the modules grok_dotted_names() grokked
+# with it
+_grokked_modules = weakref.WeakKeyDictionary()
+
+
+def grok_dotted_names(dotted_names, grokker, exclude_filter=None,
+                      ignore_nonsource=True, manifest=None,
+                      discovery_workers=None, prescanner=None,
+                      grok_workers=None, profile=None, **kw):
+    """Grok several packages or modules, each module only once.
+
+    The modules of all of them are listed first, in the order in which
+    the dotted names are given. A module that is found more than once,
+    because the packages overlap, is grokked the first time only. The
+    modules grokked are remembered for the grokker, so later calls with
+    the same grokker skip them, until they are forgotten with the
+    grokker's ``unregister_module()`` or ``clear()``.
+
+    Returns a dictionary that maps the dotted names of the modules that
+    were found more than once in this call to the dotted names they
+    were found under.
+    """
+    try:
+        grokked = _grokked_modules.setdefault(grokker, set())
+    except TypeError:
+        # we cannot refer to the grokker weakly, so we only remember
+        # what this call grokked
+        grokked = set()
+    prune = profile.prunes if profile is not None else None
+    plan = {}
+    found_under = {}
+    for dotted_name in dict.fromkeys(dotted_names):
+        module_info = scan.module_info_from_dotted_name(
+            dotted_name, exclude_filter, ignore_nonsource, manifest)
+        for info in scan.iter_module_infos(
+                module_info, discovery_workers, prune=prune):
+            found_under.setdefault(info.dotted_name, []).append(dotted_name)
+            if info.dotted_name not in grokked:
+                plan.setdefault(info.dotted_name, info)
+    for sub_module_info in _grok_module_infos(
+            plan.values(), grokker, prescanner, grok_workers, profile, kw):
+        grokked.add(sub_module_info.dotted_name)
+    return {name: under for name, under in found_under.items()
+            if len(under) > 1}
+
+
+def _grok_module_infos(module_infos, grokker, prescanner, grok_workers,
+                       profile, kw):
+    if profile is not None:
+        grokker = profile.restrict(grokker)
+        module_infos = (info for info in module_infos
+                        if profile.covers(info.dotted_name))
+    if prescanner is not None:
+        module_infos = prescanner.filter(module_infos, grokker)
+    if grok_workers is not None and hasattr(grokker, 'analyze'):
+        return _grok_modules_in_parallel(
+            module_infos, grokker, grok_workers, kw)
+    return grok_modules(module_infos, grokker, **kw)
+
+
+def grok_modules(module_infos, grokker, **kw):
+    """Grok the modules of module_infos in order.
+
+    module_infos may be any iterable, so module infos can be filtered
+    before they are grokked. Like ``iter_grok_package()``, this yields
+    every module info once its module has been grokked.
+    """
+    for module_info in module_infos:
+        grok_module(module_info, grokker, **kw)
+        yield module_info
+
+
+def _grok_modules_in_parallel(module_infos, grokker, workers, kw):
+    # Modules are imported and grokked in order in this thread, but are
+    # analyzed ahead of time by a pool of threads. We stay at most a few
+    # modules ahead, so that grokkers registered by a module are usually
+    # known when the next modules are analyzed.
+    def apply(module_info, module, future):
+        _observe_module(
+            module_info.dotted_name, grokker.grok_analyzed,
+            module_info.dotted_name, module, future.result(),
+            module_info=module_info, **kw)
+        return module_info
+
+    pending = deque()
+    with ThreadPoolExecutor(workers) as executor:
+        for module_info in module_infos:
+            module = module_info.getModule()
+            future = executor.submit(
+                grokker.analyze, module_info.dotted_name, module,
+                module_info=module_info, **kw)
+            pending.append((module_info, module, future))
+            if len(pending) > workers:
+                yield apply(*pending.popleft())
+        while pending:
+            yield apply(*pending.popleft())
 
 
 def grok_module(module_info, grokker, **kw):
-    grokker.grok(module_info.dotted_name, module_info.getModule(),
-                 module_info=module_info, **kw)
+    _observe_module(module_info.dotted_name, grokker.grok,
+                    module_info.dotted_name, module_info.getModule(),
+                    module_info=module_info, **kw)
+
+
+def _observe_module(dotted_name, grok, *args, **kw):
+    # the module events only cover grokking; importing the module has
+    # events of its own
+    if not events.subscribers:
+        return grok(*args, **kw)
+    events.notify(events.ModuleStart(dotted_name))
+    start = perf_counter()
+    try:
+        return grok(*args, **kw)
+    finally:
+        events.notify(events.ModuleEnd(dotted_name, perf_counter() - start))
 
 
 # deep meta mode here - we define grokkers that can pick up the
@@ -246,6 +960,9 @@ class MetaGrokker(ClassGrokker):
         self.multi_grokker.register(obj())
         return True
 
+    def ungrok(self, name, obj, **kw):
+        self.multi_grokker.unregister(obj())
+
 
 class ClassMetaGrokker(MetaGrokker):
     component(ClassGrokker)
@@ -1,9 +1,13 @@
 import inspect
 import sys
+import types
+import weakref
+from time import perf_counter
 
 from zope.interface.interface import TAGGED_DATA
 from zope.interface.interfaces import IInterface
 
+from martian import events
 from martian import scan
 from martian import util
 from martian.error import GrokError
@@ -13,6 +17,48 @@ from martian.error import GrokImportError
 UNKNOWN = object()
 _unused = object()
 
+# Resolved directive values by component, or None if values are not
+# cached. See enable_cache().
+_cache = None
+
+
+def enable_cache():
+    """Cache the values that bound directives resolve to.
+
+    Values are cached for classes and modules, by directive, component
+    and default. Lookups with a get_default of their own are not
+    cached. Setting a directive value, with
+    ``Directive.set()`` or by using a directive in a class or module
+    that is being defined, clears the cache. Call ``clear_cache()``
+    after changing a component in any other way.
+    """
+    global _cache
+    if _cache is None:
+        _cache = weakref.WeakKeyDictionary()
+
+
+def disable_cache():
+    global _cache
+    _cache = None
+
+
+def clear_cache():
+    if _cache is not None:
+        _cache.clear()
+
+
+def freeze(components, bound_directives):
+    """Resolve bound_directives for all of components and cache them.
+
+    Once grokking is done, this does the work of looking up the values
+    ahead of time, so later lookups only hit the cache. Enables the
+    cache if needed.
+    """
+    enable_cache()
+    for component in components:
+        for bound_directive in bound_directives:
+            bound_directive.get(component)
+
 
 class StoreOnce:
 
@@ -259,6 +305,8 @@ class Directive:
 
         value = self.factory(*args, **kw)
         self.store.set(frame.f_locals, self, value)
+        # a class or module is being (re)defined
+        clear_cache()
 
     # To get a correct error message, we construct a function that has
     # the same signature as factory(), but without "self".
@@ -283,6 +331,8 @@ class Directive:
     @classmethod
     def set(cls, component, value):
         cls.store.setattr(component, cls, value)
+        # subclasses, and classes in a module, may inherit the value
+        clear_cache()
 
     @classmethod
     def bind(cls, default=_unused, get_default=None, name=None):
@@ -314,13 +364,43 @@ class BoundDirective:
         return self.directive.default
 
     def get(self, component=None, module=None, **data):
+        cache = _cache
+        # get_default is only in the instance dict when it was passed;
+        # such functions are often made for every lookup, so caching by
+        # them would only fill the cache
+        if (cache is None or data or 'get_default' in self.__dict__ or
+                not (util.isclass(component) or
+                     isinstance(component, types.ModuleType))):
+            return self._get(component, data)
+        key = (self.directive, type(self), self.default)
+        try:
+            values = cache.get(component)
+            if values is None:
+                values = cache.setdefault(component, {})
+            return values[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # an unhashable default
+            return self._get(component, data)
+        value = values[key] = self._get(component, data)
+        return value
+
+    def _get(self, component, data):
         directive = self.directive
 
         def get_default(component, module):
             return self.get_default(component, module, **data)
 
-        return directive.scope.get(
+        if not events.subscribers:
+            return directive.scope.get(
+                directive, component, get_default=get_default)
+        start = perf_counter()
+        value = directive.scope.get(
             directive, component, get_default=get_default)
+        events.notify(events.DirectiveResolved(
+            directive, component, value, perf_counter() - start))
+        return value
 
 
 class MultipleTimesDirective(Directive):
@@ -22,3 +22,10 @@ class GrokError(Exception):
 
 class GrokImportError(ImportError):
     pass
+
+
+class ConflictError(GrokError):
+
+    def __init__(self, message, conflicts):
+        GrokError.__init__(self, message, None)
+        self.conflicts = conflicts
@@ -0,0 +1,49 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Events to observe what scanning and grokking spend their time on
+"""
+
+from collections import namedtuple
+
+
+# The subscribers are called with every event. Code that sends events
+# checks this list first, so nothing is measured if it is empty.
+subscribers = []
+
+ModuleStart = namedtuple('ModuleStart', ['dotted_name'])
+ModuleEnd = namedtuple('ModuleEnd', ['dotted_name', 'duration'])
+ImportStart = namedtuple('ImportStart', ['dotted_name'])
+ImportEnd = namedtuple('ImportEnd', ['dotted_name', 'duration'])
+GrokkerExecuted = namedtuple(
+    'GrokkerExecuted', ['grokker', 'name', 'obj', 'duration', 'result'])
+DirectiveResolved = namedtuple(
+    'DirectiveResolved', ['directive', 'component', 'value', 'duration'])
+
+
+def subscribe(subscriber):
+    """Call subscriber with every event from now on.
+
+    Events may be sent from other threads than the one that is grokking,
+    for instance when directives are resolved ahead of time.
+    """
+    subscribers.append(subscriber)
+
+
+def unsubscribe(subscriber):
+    subscribers.remove(subscriber)
+
+
+def notify(event):
+    for subscriber in tuple(subscribers):
+        subscriber(event)
@@ -0,0 +1,175 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Re-grokking modules when their source changes
+"""
+
+import importlib
+import os
+import sys
+import threading
+import types
+
+from martian import scan
+from martian.core import grok_module
+
+
+_RETRY = object()
+
+
+def _mtime(module_info):
+    try:
+        return os.stat(module_info.path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _reload(module):
+    # importlib.reload() executes the module again in its existing
+    # namespace, so names that are no longer defined would stick around;
+    # we only keep the module's own attributes and its sub modules.
+    # If executing the module fails, the namespace is put back the way
+    # it was.
+    prefix = module.__name__ + '.'
+    namespace = vars(module)
+    saved = dict(namespace)
+    for name, value in saved.items():
+        if name.startswith('__') and name.endswith('__'):
+            continue
+        if getattr(value, '__name__', '').startswith(prefix) and \
+                isinstance(value, types.ModuleType):
+            continue
+        del namespace[name]
+    try:
+        importlib.reload(module)
+    except BaseException:
+        namespace.clear()
+        namespace.update(saved)
+        raise
+
+
+class IncrementalGrokker:
+    """Grok a package, and re-grok the modules in it that change.
+
+    The package is polled for changes: modules whose source file has a
+    new modification time are reloaded and grokked again, new modules are
+    grokked and removed modules are forgotten.
+
+    Before a module is grokked again, whatever was grokked from it before
+    is undone by calling ``ungrok(name, obj, **kw)`` on the grokkers that
+    grokked it, for those grokkers that have such a method. Meta grokkers
+    use this to unregister grokkers that were defined in the module.
+
+    Only the changed modules themselves are reloaded; modules that import
+    from them keep referring to the old objects.
+
+    If reloading or grokking a module fails, for instance because it was
+    saved with a syntax error, the error is kept in ``errors`` under the
+    dotted name of the module and the module is tried again on the next
+    poll. A module that cannot be reloaded keeps its old contents and
+    what was grokked from it.
+    """
+
+    def __init__(self, dotted_name, grokker, exclude_filter=None,
+                 ignore_nonsource=True, **kw):
+        self.dotted_name = dotted_name
+        self.grokker = grokker
+        self.exclude_filter = exclude_filter
+        self.ignore_nonsource = ignore_nonsource
+        self.kw = kw
+        if grokker.provenance is None:
+            grokker.provenance = {}
+        self._mtimes = {}
+        # dotted name -> the error the last poll ran into for it
+        self.errors = {}
+
+    def _module_infos(self):
+        module_info = scan.module_info_from_dotted_name(
+            self.dotted_name, self.exclude_filter, self.ignore_nonsource)
+        return scan.iter_module_infos(module_info)
+
+    def grok(self):
+        """Grok the whole package."""
+        for module_info in self._module_infos():
+            self._mtimes[module_info.dotted_name] = _mtime(module_info)
+            grok_module(module_info, self.grokker, **self.kw)
+
+    def _ungrok(self, dotted_name):
+        grokked = self.grokker.provenance.pop(dotted_name, [])
+        for grokker, name, obj in reversed(grokked):
+            ungrok = getattr(grokker, 'ungrok', None)
+            if ungrok is not None:
+                ungrok(name, obj, **self.kw)
+
+    def poll(self):
+        """Re-grok the modules that changed since the last poll.
+
+        Returns the dotted names of the modules that were grokked again,
+        grokked for the first time or removed.
+        """
+        changed = []
+        seen = set()
+        for module_info in self._module_infos():
+            dotted_name = module_info.dotted_name
+            seen.add(dotted_name)
+            mtime = _mtime(module_info)
+            known = dotted_name in self._mtimes
+            if known and self._mtimes[dotted_name] == mtime:
+                continue
+            try:
+                if known:
+                    module = sys.modules.get(dotted_name)
+                    if module is not None:
+                        _reload(module)
+                    self._ungrok(dotted_name)
+                grok_module(module_info, self.grokker, **self.kw)
+            except Exception as e:
+                self.errors[dotted_name] = e
+                if known:
+                    # no modification time matches this, so it is tried
+                    # again
+                    self._mtimes[dotted_name] = _RETRY
+                continue
+            self.errors.pop(dotted_name, None)
+            self._mtimes[dotted_name] = mtime
+            changed.append(dotted_name)
+        for dotted_name in sorted(set(self._mtimes) - seen):
+            self._ungrok(dotted_name)
+            del self._mtimes[dotted_name]
+            changed.append(dotted_name)
+        for dotted_name in set(self.errors) - seen:
+            del self.errors[dotted_name]
+        return changed
+
+    def watch(self, interval=1.0, stop=None):
+        """Poll for changes every interval seconds.
+
+        This blocks until the threading.Event stop is set, so it is
+        normally run in a thread of its own. If a poll fails as a whole,
+        for instance because the package cannot be listed, the error is
+        kept in ``errors`` under the dotted name of the package and we
+        keep on polling.
+        """
+        if stop is None:
+            stop = threading.Event()
+        failure = None
+        while not stop.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                failure = self.errors[self.dotted_name] = e
+            else:
+                if failure is not None and \
+                        self.errors.get(self.dotted_name) is failure:
+                    del self.errors[self.dotted_name]
+                failure = None
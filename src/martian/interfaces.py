@@ -52,6 +52,22 @@ class IMultiGrokker(IComponentGrokker):
         """Register a grokker.
         """
 
+    def unregister(grokker):
+        """Unregister a grokker of the same class as grokker.
+        """
+
+    def unregister_module(dotted_name):
+        """Unregister the grokkers defined in a module or package.
+        """
+
+    def find(grokker_class):
+        """Return the registered grokker of grokker_class, or None.
+        """
+
+    def grokker_classes():
+        """Return the classes of the registered grokkers.
+        """
+
     def clear():
         """Clear all grokkers and go back to initial state.
         """
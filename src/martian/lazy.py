@@ -0,0 +1,128 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Grokking the modules of a package when they are first imported
+"""
+
+import sys
+import threading
+
+from martian import scan
+from martian.core import grok_module
+
+
+class _GrokkingLoader:
+    """Wrap a loader to grok the module once it has been executed."""
+
+    def __init__(self, loader, lazy_grokker):
+        self._loader = loader
+        self._lazy_grokker = lazy_grokker
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._loader.exec_module(module)
+        self._lazy_grokker._grok(module.__name__, module)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class LazyGrokker:
+    """Grok the modules of a package as they get imported.
+
+    ``install()`` lists the modules in the package without importing
+    them, groks the modules that are already imported and hooks into
+    ``sys.meta_path``, so that each of the other modules is grokked as
+    soon as it is first imported. ``grok_remaining()`` groks the modules
+    that were not imported yet.
+
+    Modules are grokked in the order in which they are imported, rather
+    than in the order of the package, so a grokker defined in a module
+    only applies to the modules imported after it.
+    """
+
+    def __init__(self, dotted_name, grokker, exclude_filter=None,
+                 ignore_nonsource=True, **kw):
+        self.dotted_name = dotted_name
+        self.grokker = grokker
+        self.exclude_filter = exclude_filter
+        self.ignore_nonsource = ignore_nonsource
+        self.kw = kw
+        # dotted name -> module info of the modules not grokked yet
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """The dotted names of the modules that were not grokked yet."""
+        return list(self._pending)
+
+    def install(self):
+        module_info = scan.module_info_from_dotted_name(
+            self.dotted_name, self.exclude_filter, self.ignore_nonsource)
+        for info in scan.iter_module_infos(module_info):
+            self._pending[info.dotted_name] = info
+        sys.meta_path.insert(0, self)
+        for dotted_name in self.pending:
+            if dotted_name in sys.modules:
+                self._grok(dotted_name)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def grok_remaining(self):
+        """Grok all modules that were not grokked yet, and uninstall."""
+        for dotted_name in self.pending:
+            self._grok(dotted_name)
+        self.uninstall()
+
+    def _grok(self, dotted_name, module=None):
+        with self._lock:
+            module_info = self._pending.pop(dotted_name, None)
+        if module_info is None:
+            return
+        if module is not None:
+            # the module is still being imported, so it cannot be looked
+            # up through its package yet
+            module_info.setModule(module)
+        # otherwise this imports the module if needed, which comes back
+        # here but finds nothing to do
+        try:
+            grok_module(module_info, self.grokker, **self.kw)
+        except BaseException:
+            # the import fails as well, so grok it again when the module
+            # is imported again
+            with self._lock:
+                self._pending.setdefault(dotted_name, module_info)
+            raise
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in self._pending:
+            return None
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if getattr(spec.loader, 'exec_module', None) is not None:
+            spec.loader = _GrokkingLoader(spec.loader, self)
+        return spec
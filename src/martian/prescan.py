@@ -0,0 +1,260 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Static pre-scan of module sources to avoid needless imports
+"""
+
+import ast
+import builtins
+import sys
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+
+_UNKNOWN = object()
+
+
+def summarize(path):
+    """Summarize the module-level statements in the source file at path.
+
+    Returns a list of the bindings the module makes, in order, or None if
+    the module does anything we cannot reason about without importing it.
+    """
+    try:
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+    summary = []
+    for i, node in enumerate(tree.body):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname is None:
+                    # import a.b binds a
+                    name = alias.name.split('.')[0]
+                    summary.append(('import', name, 0, name, None))
+                else:
+                    summary.append(
+                        ('import', alias.asname, 0, alias.name, None))
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name == '*':
+                    return None
+                summary.append(
+                    ('import', alias.asname or alias.name, node.level,
+                     node.module, alias.name))
+        elif isinstance(node, ast.ClassDef):
+            if node.decorator_list or node.keywords:
+                return None
+            bases = [_dotted_name(base) for base in node.bases]
+            if None in bases:
+                return None
+            summary.append(('class', node.name, bases))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.decorator_list:
+                return None
+            summary.append(('function', node.name))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            if node.value is None:
+                # a bare annotation binds nothing
+                continue
+            try:
+                value = ast.literal_eval(node.value)
+            except (ValueError, TypeError, SyntaxError, RecursionError):
+                return None
+            if isinstance(node, ast.Assign):
+                targets = node.targets
+            else:
+                targets = [node.target]
+            for target in targets:
+                if not isinstance(target, ast.Name):
+                    return None
+                summary.append(('constant', target.id, type(value)))
+        elif (isinstance(node, ast.Expr) and i == 0 and
+              isinstance(node.value, ast.Constant)):
+            # the module docstring
+            continue
+        elif isinstance(node, ast.If) and _is_main_check(node.test):
+            continue
+        else:
+            return None
+    return summary
+
+
+def _dotted_name(node):
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return '.'.join(reversed(parts))
+
+
+def _is_main_check(test):
+    return (isinstance(test, ast.Compare) and
+            isinstance(test.left, ast.Name) and
+            test.left.id == '__name__' and
+            len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq) and
+            isinstance(test.comparators[0], ast.Constant) and
+            test.comparators[0].value == '__main__')
+
+
+class _LocalClass:
+    """A class defined by a module that has not been imported."""
+
+    def __init__(self, bases):
+        self.bases = bases
+
+
+def _resolve_import(package_dotted_name, level, module, attr):
+    # resolve against the modules that are already imported; we never
+    # import anything here
+    if level:
+        parts = package_dotted_name.split('.')
+        if level > 1:
+            parts = parts[:-(level - 1)]
+        if module:
+            parts.append(module)
+        module = '.'.join(parts)
+    if attr is None:
+        return sys.modules.get(module, _UNKNOWN)
+    result = sys.modules.get(module + '.' + attr)
+    if result is not None:
+        return result
+    module = sys.modules.get(module)
+    if module is None:
+        return _UNKNOWN
+    return getattr(module, attr, _UNKNOWN)
+
+
+def _resolve_base(bindings, dotted_name):
+    name, *attrs = dotted_name.split('.')
+    if name in bindings:
+        obj = bindings[name]
+    else:
+        obj = getattr(builtins, name, _UNKNOWN)
+    for attr in attrs:
+        if obj is _UNKNOWN or isinstance(obj, _LocalClass):
+            return _UNKNOWN
+        obj = getattr(obj, attr, _UNKNOWN)
+    return obj
+
+
+def _may_be_grokked(bases, classes, instances):
+    for base in bases:
+        if base is _UNKNOWN:
+            return True
+        if isinstance(base, _LocalClass):
+            if _may_be_grokked(base.bases, classes, instances):
+                return True
+        elif not isinstance(base, type):
+            # a base that is not a class, such as an interface or
+            # typing.NamedTuple, may give us anything, possibly even a
+            # subclass of a class we look for
+            return True
+        elif any(issubclass(base, class_) for class_ in classes):
+            return True
+    return False
+
+
+def needs_import(summary, package_dotted_name, components):
+    """Decide whether a module with the given summary needs to be imported.
+
+    components is the ``(classes, instances)`` tuple returned by the
+    grokker's ``components()``, or None if the grokker needs to see every
+    module.
+    """
+    if summary is None or components is None:
+        return True
+    # grokkers whose component is not a class, such as None for those
+    # without one, never match anything
+    classes, instances = (
+        [component for component in kind if isinstance(component, type)]
+        for kind in components)
+    bindings = {}
+    for entry in summary:
+        kind, name = entry[:2]
+        if kind == 'import':
+            bindings[name] = _resolve_import(package_dotted_name, *entry[2:])
+        elif kind == 'class':
+            bases = [_resolve_base(bindings, base) for base in entry[2]]
+            if not bases:
+                bases = [object]
+            if _may_be_grokked(bases, classes, instances):
+                return True
+            bindings[name] = _LocalClass(bases)
+        elif kind == 'function':
+            if any(issubclass(types.FunctionType, instance)
+                   for instance in instances):
+                return True
+            bindings[name] = _UNKNOWN
+        elif kind == 'constant':
+            if any(issubclass(entry[2], instance)
+                   for instance in instances):
+                return True
+            bindings[name] = _UNKNOWN
+    return False
+
+
+def _components(grokker):
+    components = getattr(grokker, 'components', None)
+    if components is None:
+        return None
+    return components()
+
+
+class Prescanner:
+    """Skip importing modules that cannot contain anything to grok.
+
+    The sources of all modules are parsed up front, in a pool of
+    max_workers processes if it is given. A module is only skipped if
+    its source shows that it defines nothing the grokker looks for; if
+    we cannot tell, the module is imported.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self.skipped = []
+
+    def summarize(self, module_infos):
+        paths = [getattr(module_info, 'path', None)
+                 for module_info in module_infos]
+        if self.max_workers is None:
+            return [_summarize_path(path) for path in paths]
+        with ProcessPoolExecutor(self.max_workers) as executor:
+            return list(executor.map(_summarize_path, paths, chunksize=16))
+
+    def filter(self, module_infos, grokker):
+        """Iterate over the module infos that need to be grokked.
+
+        The decision for a module is made when it is reached, so grokkers
+        registered while grokking earlier modules are taken into account.
+        """
+        module_infos = list(module_infos)
+        summaries = self.summarize(module_infos)
+        for module_info, summary in zip(module_infos, summaries):
+            dotted_name = getattr(module_info, 'dotted_name', None)
+            if (dotted_name in sys.modules or
+                    needs_import(summary, module_info.package_dotted_name,
+                                 _components(grokker))):
+                yield module_info
+            else:
+                self.skipped.append(module_info)
+
+
+def _summarize_path(path):
+    if path is None:
+        return None
+    return summarize(path)
@@ -14,47 +14,257 @@
 """Scanning packages and modules
 """
 
+import json
 import os
+import pkgutil
+import sys
+import weakref
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
 
 from zope.interface import implementer
 
+from martian import events
 from martian.interfaces import IModuleInfo
 
 
 def is_package(path):
     if not os.path.isdir(path):
         return False
+    return _has_init(path)
+
+
+def _has_init(path):
     init_py = os.path.join(path, '__init__.py')
     init_pyc = init_py + 'c'
     # Check whether either __init__.py or __init__.pyc exist
     return os.path.isfile(init_py) or os.path.isfile(init_pyc)
 
 
+def _entry_name(entry):
+    return entry.name
+
+
+def _listdir(directory):
+    """List the entries of directory that could be modules or packages.
+
+    Returns a sorted list of ``(entry_name, is_dir)`` pairs. Files are
+    only listed if they have a ``.py`` or ``.pyc`` extension; whether a
+    directory is really a package is left to the caller.
+    """
+    # os.scandir() gives us the entry type from the directory listing
+    # itself on most platforms, so classifying entries does not need a
+    # stat() call per entry.
+    with os.scandir(directory) as it:
+        entries = sorted(it, key=_entry_name)
+    result = []
+    for entry in entries:
+        # we are only interested in things that are potentially
+        # python modules or packages, and therefore start with a
+        # letter or _
+        if not entry.name[0].isalpha() and entry.name[0] != '_':
+            continue
+        ext = os.path.splitext(entry.name)[1]
+        if ext in ('.py', '.pyc') and entry.is_file():
+            result.append((entry.name, False))
+        elif entry.is_dir():
+            result.append((entry.name, True))
+    return result
+
+
+MANIFEST_VERSION = 1
+
+
+def _valid_record(record):
+    return (isinstance(record, dict) and
+            isinstance(record.get('mtime'), int) and
+            isinstance(record.get('entries', []), list) and
+            all(_valid_entry(entry) for entry in record.get('entries', ())) and
+            isinstance(record.get('init', False), bool))
+
+
+def _valid_entry(entry):
+    # a (name, is_directory) pair, which JSON turns into a list
+    return (isinstance(entry, list) and len(entry) == 2 and
+            isinstance(entry[0], str) and isinstance(entry[1], bool))
+
+
+class ScanManifest:
+    """A persistent record of the directory listings made while scanning.
+
+    For every directory it records the modification time together with
+    the candidate entries and whether it contains an ``__init__.py``.
+    As long as the modification time of a directory is unchanged the
+    recorded information is used instead of listing the directory again.
+    Note that the modification time of a directory only changes when
+    entries are added, removed or renamed, so every directory is still
+    checked on its own.
+
+    If ``path`` is given, the manifest is loaded from that file if it
+    exists, and ``save()`` writes it back.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.changed = False
+        self._records = {}
+        if path is not None:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # a missing or corrupt manifest means we start from scratch
+            return
+        if not isinstance(data, dict) or \
+                data.get('version') != MANIFEST_VERSION:
+            return
+        directories = data.get('directories')
+        if not isinstance(directories, dict):
+            return
+        self._records = {
+            directory: record for directory, record in directories.items()
+            if _valid_record(record) and os.path.isdir(directory)}
+        # records of directories that are gone, or that we cannot use,
+        # are dropped from the file on the next save
+        self.changed = len(self._records) != len(directories)
+
+    def save(self):
+        if self.path is None or not self.changed:
+            return
+        data = {'version': MANIFEST_VERSION, 'directories': self._records}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+    def _record(self, directory):
+        mtime = os.stat(directory).st_mtime_ns
+        record = self._records.get(directory)
+        if record is None or record['mtime'] != mtime:
+            record = self._records[directory] = {'mtime': mtime}
+            self.changed = True
+        return record
+
+    def listdir(self, directory):
+        record = self._record(directory)
+        entries = record.get('entries')
+        if entries is None:
+            entries = record['entries'] = _listdir(directory)
+            self.changed = True
+        return entries
+
+    def has_init(self, directory):
+        record = self._record(directory)
+        result = record.get('init')
+        if result is None:
+            result = record['init'] = _has_init(directory)
+            self.changed = True
+        return result
+
+
+def _exclude_nothing(name):
+    return False
+
+
+# The settings of a scan. One instance of this is shared by all module
+# infos that result from a scan.
+ScanConfig = namedtuple(
+    'ScanConfig', ['exclude_filter', 'ignore_nonsource', 'manifest'])
+
+
+def make_scan_config(exclude_filter=None, ignore_nonsource=True,
+                     manifest=None):
+    if exclude_filter is None:
+        # this exclude filter receives extensionless filenames
+        exclude_filter = _exclude_nothing
+    return ScanConfig(exclude_filter, ignore_nonsource, manifest)
+
+
+class ModuleInfoBase:
+    """Base class for module infos.
+
+    Module infos live as long as the scanned tree is kept around, so they
+    use ``__slots__`` and refer to a shared ``ScanConfig`` for the scan
+    settings.
+    """
+
+    __slots__ = ('dotted_name', 'config', '_module')
+
+    @property
+    def exclude_filter(self):
+        return self.config.exclude_filter
+
+    @property
+    def ignore_nonsource(self):
+        return self.config.ignore_nonsource
+
+    @property
+    def manifest(self):
+        return self.config.manifest
+
+    @property
+    def name(self):
+        return self.dotted_name.rpartition('.')[2]
+
+    @property
+    def package_dotted_name(self):
+        if self.isPackage():
+            return self.dotted_name
+        return self.dotted_name.rpartition('.')[0]
+
+    def getAnnotation(self, key, default):
+        key = key.replace('.', '_')
+        key = '__%s__' % key
+        module = self.getModule()
+        return getattr(module, key, default)
+
+    def getModule(self):
+        if self._module is None:
+            if events.subscribers:
+                events.notify(events.ImportStart(self.dotted_name))
+                start = perf_counter()
+                try:
+                    self._module = resolve(self.dotted_name)
+                finally:
+                    events.notify(events.ImportEnd(
+                        self.dotted_name, perf_counter() - start))
+            else:
+                self._module = resolve(self.dotted_name)
+        return self._module
+
+    def setModule(self, module):
+        """Use module as the module of this module info.
+
+        This is for a module that is being imported, which cannot be
+        looked up in its package yet.
+        """
+        self._module = module
+
+    def isPackage(self):
+        raise NotImplementedError
+
+
 @implementer(IModuleInfo)
-class ModuleInfo:
+class ModuleInfo(ModuleInfoBase):
+
+    __slots__ = ('path',)
 
     def __init__(self, path, dotted_name, exclude_filter=None,
-                 ignore_nonsource=True):
+                 ignore_nonsource=True, manifest=None, config=None):
         # Normalize .pyc files to .py
         if path.endswith('c'):
             path = path[:-1]
         self.path = path
         self.dotted_name = dotted_name
-        self.ignore_nonsource = ignore_nonsource
-
-        if exclude_filter is None:
-            # this exclude filter receives extensionless filenames
-            self.exclude_filter = lambda x: False
-        else:
-            self.exclude_filter = exclude_filter
-
-        name_parts = dotted_name.split('.')
-        self.name = name_parts[-1]
-        if self.isPackage():
-            self.package_dotted_name = dotted_name
-        else:
-            self.package_dotted_name = '.'.join(name_parts[:-1])
-
+        if config is None:
+            config = make_scan_config(
+                exclude_filter, ignore_nonsource, manifest)
+        self.config = config
         self._module = None
 
     def getResourcePath(self, name):
@@ -73,45 +283,42 @@ class ModuleInfo:
         if not self.isPackage():
             return []
         directory = os.path.dirname(self.path)
+        if self.manifest is None:
+            entries = _listdir(directory)
+            has_init = _has_init
+        else:
+            entries = self.manifest.listdir(directory)
+            has_init = self.manifest.has_init
         module_infos = []
-        seen = []
-        for entry in sorted(os.listdir(directory)):
-            # we are only interested in things that are potentially
-            # python modules or packages, and therefore start with a
-            # letter or _
-            if not entry[0].isalpha() and entry[0] != '_':
-                continue
-            entry_path = os.path.join(directory, entry)
-            name, ext = os.path.splitext(entry)
+        seen = set()
+        for entry_name, is_dir in entries:
+            name, ext = os.path.splitext(entry_name)
             dotted_name = self.dotted_name + '.' + name
             if self.exclude_filter(name) or name == '__main__':
                 continue
             if self.ignore_nonsource:
-                if ext in ['.pyo', '.pyc']:
+                if ext in ('.pyo', '.pyc'):
                     continue
+            entry_path = os.path.join(directory, entry_name)
             # Case one: modules
-            if (os.path.isfile(entry_path) and ext in ['.py', '.pyc']):
+            if not is_dir:
                 if name == '__init__':
                     continue
                 # Avoid duplicates when both .py and .pyc exist
                 if name in seen:
                     continue
-                seen.append(name)
+                seen.add(name)
                 module_infos.append(
-                    ModuleInfo(entry_path,
-                               dotted_name,
-                               exclude_filter=self.exclude_filter,
-                               ignore_nonsource=self.ignore_nonsource))
+                    ModuleInfo(entry_path, dotted_name, config=self.config))
             # Case two: packages
-            elif is_package(entry_path):
+            elif has_init(entry_path):
                 # We can blindly use __init__.py even if only
                 # __init__.pyc exists because we never actually use
                 # that filename.
                 module_infos.append(ModuleInfo(
                     os.path.join(entry_path, '__init__.py'),
                     dotted_name,
-                    exclude_filter=self.exclude_filter,
-                    ignore_nonsource=self.ignore_nonsource))
+                    config=self.config))
         return module_infos
 
     def getSubModuleInfo(self, name):
@@ -120,28 +327,15 @@ class ModuleInfo:
             return ModuleInfo(
                 os.path.join(path, '__init__.py'),
                 f'{self.package_dotted_name}.{name}',
-                exclude_filter=self.exclude_filter,
-                ignore_nonsource=self.ignore_nonsource)
+                config=self.config)
         elif os.path.isfile(path + '.py') or os.path.isfile(path + '.pyc'):
             return ModuleInfo(
                 path + '.py',
                 f'{self.package_dotted_name}.{name}',
-                exclude_filter=self.exclude_filter,
-                ignore_nonsource=self.ignore_nonsource)
+                config=self.config)
         else:
             return None
 
-    def getAnnotation(self, key, default):
-        key = key.replace('.', '_')
-        key = '__%s__' % key
-        module = self.getModule()
-        return getattr(module, key, default)
-
-    def getModule(self):
-        if self._module is None:
-            self._module = resolve(self.dotted_name)
-        return self._module
-
     def isPackage(self):
         return self.path.endswith('__init__.py')
 
@@ -149,6 +343,126 @@ class ModuleInfo:
         return "<ModuleInfo object for '%s'>" % self.dotted_name
 
 
+@implementer(IModuleInfo)
+class LoaderModuleInfo(ModuleInfoBase):
+    """Module info for modules that do not live on the file system.
+
+    Sub modules are found through the import system's finders using
+    ``pkgutil.iter_modules``, so packages inside a zip archive (such as
+    a zipapp or a zipped site-packages) can be scanned in place.
+
+    search_path is the ``__path__`` of the package for packages, and the
+    ``__path__`` of the containing package for modules.
+    """
+
+    __slots__ = ('search_path', '_is_package')
+
+    def __init__(self, dotted_name, search_path, is_package,
+                 exclude_filter=None, ignore_nonsource=True, config=None):
+        self.dotted_name = dotted_name
+        self.search_path = list(search_path)
+        self._is_package = is_package
+        if config is None:
+            config = make_scan_config(exclude_filter, ignore_nonsource)
+        self.config = config
+        self._module = None
+
+    @property
+    def path(self):
+        if self._is_package:
+            return os.path.join(self.search_path[0], '__init__.py')
+        return os.path.join(self.search_path[0], self.name + '.py')
+
+    def getResourcePath(self, name):
+        # The resource may be inside an archive, in which case this
+        # path only makes sense to the loader.
+        return os.path.join(os.path.dirname(self.path), name)
+
+    def _iter_sub_module_infos(self):
+        prefix = self.package_dotted_name + '.'
+        for finder, name, is_package in sorted(
+                pkgutil.iter_modules(self.search_path),
+                key=_module_info_name):
+            if not name[0].isalpha() and name[0] != '_':
+                continue
+            if self.exclude_filter(name) or name == '__main__':
+                continue
+            if self.ignore_nonsource and not _has_source(finder,
+                                                         prefix + name):
+                continue
+            if is_package:
+                search_path = [os.path.join(entry, name)
+                               for entry in self.search_path]
+            else:
+                search_path = self.search_path
+            yield name, LoaderModuleInfo(
+                prefix + name, search_path, is_package, config=self.config)
+
+    def getSubModuleInfos(self):
+        if not self.isPackage():
+            return []
+        module_infos = []
+        seen = set()
+        for name, module_info in self._iter_sub_module_infos():
+            # a name may be found in more than one path entry
+            if name in seen:
+                continue
+            seen.add(name)
+            module_infos.append(module_info)
+        return module_infos
+
+    def getSubModuleInfo(self, name):
+        for sub_name, module_info in self._iter_sub_module_infos():
+            if sub_name == name:
+                return module_info
+        return None
+
+    def isPackage(self):
+        return self._is_package
+
+    def __repr__(self):
+        return "<LoaderModuleInfo object for '%s'>" % self.dotted_name
+
+
+def _module_info_name(module_info):
+    return module_info.name
+
+
+def _has_source(finder, dotted_name):
+    find_spec = getattr(finder, 'find_spec', None)
+    if find_spec is None:
+        # we cannot tell without a spec, so assume there is source
+        return True
+    spec = find_spec(dotted_name)
+    if spec is None or not spec.has_location:
+        return True
+    return not spec.origin.endswith(('.pyc', '.pyo'))
+
+
+def _is_on_file_system(module):
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return getattr(module, '__spec__', None) is None
+    # modules without a spec were not imported through the import
+    # system, so we cannot ask a loader about them either
+    return os.path.isfile(path) or module.__spec__ is None
+
+
+def _loader_module_info(module, exclude_filter, ignore_nonsource):
+    dotted_name = module.__name__
+    search_path = getattr(module, '__path__', None)
+    if search_path is not None:
+        return LoaderModuleInfo(dotted_name, search_path, True,
+                                exclude_filter, ignore_nonsource)
+    package_dotted_name = dotted_name.rpartition('.')[0]
+    if package_dotted_name:
+        search_path = resolve(package_dotted_name).__path__
+    else:
+        search_path = sys.path
+    return LoaderModuleInfo(dotted_name, search_path, False,
+                            exclude_filter, ignore_nonsource)
+
+
 class BuiltinDummyModule:
     """Needed for BuiltinModuleInfo"""
     pass
@@ -182,7 +496,8 @@ class BuiltinModuleInfo:
 
 
 def module_info_from_dotted_name(
-        dotted_name, exclude_filter=None, ignore_nonsource=True):
+        dotted_name, exclude_filter=None, ignore_nonsource=True,
+        manifest=None):
     if dotted_name == 'builtins':
         # In case of the use of individually grokking something during a test
         # the dotted_name being passed in is ``builtins``.  In this case we
@@ -190,20 +505,116 @@ def module_info_from_dotted_name(
         # work.
         return BuiltinModuleInfo()
     module = resolve(dotted_name)
+    if not _is_on_file_system(module):
+        return _loader_module_info(module, exclude_filter, ignore_nonsource)
     return ModuleInfo(module.__file__, dotted_name, exclude_filter,
-                      ignore_nonsource)
+                      ignore_nonsource, manifest)
 
 
 def module_info_from_module(
-        module, exclude_filter=None, ignore_nonsource=True):
+        module, exclude_filter=None, ignore_nonsource=True, manifest=None):
+    if not _is_on_file_system(module):
+        return _loader_module_info(module, exclude_filter, ignore_nonsource)
     return ModuleInfo(
-        module.__file__, module.__name__, exclude_filter, ignore_nonsource)
+        module.__file__, module.__name__, exclude_filter, ignore_nonsource,
+        manifest)
+
+
+def _list_sub_module_infos(module_info, prune=None):
+    if not module_info.isPackage():
+        return None
+    sub_module_infos = module_info.getSubModuleInfos()
+    if prune is not None:
+        sub_module_infos = [info for info in sub_module_infos
+                            if not prune(info)]
+    return sub_module_infos
+
+
+def iter_module_infos(module_info, max_workers=None, prune=None):
+    """Iterate over module_info and all its sub modules, depth first.
+
+    The package is walked from an explicit stack rather than recursively,
+    so deeply nested packages are fine, and the module infos are produced
+    as the walk goes.
+
+    If max_workers is given, the sub modules of sibling packages are
+    listed concurrently by a pool of at most max_workers threads. The
+    module infos are still produced in the same order.
+
+    If prune is given, it is called with every module info; the module
+    infos it returns True for are skipped, and packages are not walked
+    into.
+    """
+    if prune is not None and prune(module_info):
+        return
+    if max_workers is None:
+        stack = [module_info]
+        while stack:
+            module_info = stack.pop()
+            yield module_info
+            sub_module_infos = _list_sub_module_infos(module_info, prune)
+            if sub_module_infos:
+                stack.extend(reversed(sub_module_infos))
+        return
+
+    executor = ThreadPoolExecutor(max_workers)
+
+    def schedule(module_info):
+        return module_info, executor.submit(
+            _list_sub_module_infos, module_info, prune)
+
+    try:
+        stack = [schedule(module_info)]
+        while stack:
+            module_info, future = stack.pop()
+            yield module_info
+            sub_module_infos = future.result()
+            if sub_module_infos:
+                # start listing all siblings at once, then continue
+                # depth first with the first one
+                stack.extend(reversed(
+                    [schedule(info) for info in sub_module_infos]))
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+# The maximum number of dotted names remembered by resolve().
+RESOLVE_CACHE_SIZE = 4096
+
+# dotted name -> (module name, weak reference to the module, remaining
+# attribute names); modules are referred to weakly, so that modules
+# that are removed from sys.modules can go away
+_resolved = {}
+
+
+def clear_resolve_cache():
+    _resolved.clear()
 
 
 # taken from zope.dottedname.resolve
 def resolve(name, module=None):
+    entry = _resolved.get(name)
+    if entry is not None:
+        # We remember the deepest module on the way to the object, so we
+        # can check that it is still the one in sys.modules; attributes
+        # are looked up again, as modules may have been reloaded or
+        # patched since.
+        module_name, ref, attrs = entry
+        found = ref()
+        if found is not None and sys.modules.get(module_name) is found:
+            try:
+                for n in attrs:
+                    found = getattr(found, n)
+            except AttributeError:
+                pass
+            else:
+                return found
+        _resolved.pop(name, None)
+
+    dotted_name = name
     name = name.split('.')
-    if not name[0]:
+    relative = not name[0]
+    if relative:
         if module is None:
             raise ValueError("relative name without base module")
         module = module.split('.')
@@ -215,12 +626,31 @@ def resolve(name, module=None):
 
     used = name.pop(0)
     found = __import__(used)
-    for n in name:
+    deepest = None
+    if sys.modules.get(used) is found:
+        deepest = used, found, 0
+    for i, n in enumerate(name, 1):
         used += '.' + n
         try:
             found = getattr(found, n)
         except AttributeError:
             __import__(used)
             found = getattr(found, n)
+        if sys.modules.get(used) is found:
+            deepest = used, found, i
 
+    if deepest is not None and not relative:
+        module_name, module_found, i = deepest
+        try:
+            ref = weakref.ref(module_found)
+        except TypeError:
+            # not a real module, we do not remember it
+            return found
+        if len(_resolved) >= RESOLVE_CACHE_SIZE:
+            try:
+                del _resolved[next(iter(_resolved))]
+            except (KeyError, RuntimeError, StopIteration):
+                # another thread got there first
+                pass
+        _resolved[dotted_name] = (module_name, ref, tuple(name[i:]))
     return found
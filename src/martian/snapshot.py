@@ -0,0 +1,368 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Recording what was grokked, to replay it on a later start
+"""
+
+import hashlib
+import json
+import os
+import pkgutil
+import sys
+from functools import partial
+
+from martian import scan
+from martian.core import grok_module
+from martian.error import GrokError
+from martian.martiandirective import directive
+
+
+SNAPSHOT_VERSION = 2
+
+
+class _Unserializable(Exception):
+    pass
+
+
+def _reference(obj):
+    module_name = getattr(obj, '__module__', None)
+    qualname = getattr(obj, '__qualname__', None)
+    if qualname is None:
+        qualname = getattr(obj, '__name__', None)
+    if not isinstance(module_name, str) or not isinstance(qualname, str):
+        raise _Unserializable(obj)
+    reference = module_name + ':' + qualname
+    try:
+        if _dereference(reference) is obj:
+            return reference
+    except (ImportError, AttributeError):
+        pass
+    raise _Unserializable(obj)
+
+
+def _dereference(reference):
+    module_name, qualname = reference.split(':')
+    obj = sys.modules.get(module_name)
+    if obj is None:
+        obj = scan.resolve(module_name)
+    for name in qualname.split('.'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _dump(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_dump(item) for item in value]
+    if isinstance(value, tuple):
+        return {'tuple': [_dump(item) for item in value]}
+    if isinstance(value, dict):
+        return {'dict': [[_dump(key), _dump(item)]
+                         for key, item in value.items()]}
+    return {'ref': _reference(value)}
+
+
+def _load(value):
+    if isinstance(value, list):
+        return [_load(item) for item in value]
+    if isinstance(value, dict):
+        if 'tuple' in value:
+            return tuple(_load(item) for item in value['tuple'])
+        if 'dict' in value:
+            return {_load(key): _load(item) for key, item in value['dict']}
+        return _dereference(value['ref'])
+    return value
+
+
+def _read(path):
+    """Read the file at path, which may be inside an archive.
+
+    Returns None if it cannot be read.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        pass
+    # a module in a zip file, for instance, can only be read through the
+    # importer for its directory
+    importer = pkgutil.get_importer(os.path.dirname(path))
+    get_data = getattr(importer, 'get_data', None)
+    if get_data is None:
+        return None
+    try:
+        return get_data(path)
+    except OSError:
+        return None
+
+
+def _file_digest(path):
+    data = _read(path)
+    if data is None:
+        return None
+    return hashlib.sha256(data).hexdigest()
+
+
+def _module_paths(class_):
+    """The source paths of the modules of class_ and its bases."""
+    paths = set()
+    for base in class_.__mro__:
+        path = getattr(sys.modules.get(base.__module__), '__file__', None)
+        if path is not None:
+            paths.add(path)
+    return paths
+
+
+def tree_hash(module_infos, grokker=None):
+    """Hash the dotted names and sources of the given modules.
+
+    If grokker is given, the names of the grokkers registered with it,
+    and the sources of the modules defining them and their bases, are
+    hashed as well. Returns None if a source cannot be read.
+    """
+    sha = hashlib.sha256()
+    paths = set()
+    for module_info in module_infos:
+        sha.update(module_info.dotted_name.encode('utf-8') + b'\0')
+        path = getattr(module_info, 'path', None)
+        if path is not None:
+            digest = _file_digest(path)
+            if digest is None:
+                return None
+            sha.update(digest.encode('ascii'))
+    grokker_classes = getattr(grokker, 'grokker_classes', None)
+    if grokker_classes is not None:
+        sha.update(b'grokkers\0')
+        for name, grokker_class in sorted(
+                (g_class.__module__ + ':' + g_class.__qualname__, g_class)
+                for g_class in grokker_classes() or ()):
+            sha.update(name.encode('utf-8') + b'\0')
+            paths.update(_module_paths(grokker_class))
+    for path in sorted(paths):
+        digest = _file_digest(path)
+        if digest is None:
+            return None
+        sha.update(digest.encode('ascii'))
+    return sha.hexdigest()
+
+
+class Snapshot:
+    """What was grokked from a package, stored as JSON at path.
+
+    Set a snapshot as the ``recorder`` of a ``ModuleGrokker`` to record
+    every object a grokker grokked successfully. Class grokkers are
+    recorded together with the values of their directives, so that
+    replaying them calls ``execute()`` directly; other grokkers are
+    replayed by grokking the object again.
+
+    Objects are referred to by the name of their module and their name in
+    it, and directive values by dotted name, so a snapshot can only be
+    made if all of these can be looked up again. If something cannot be,
+    the snapshot is marked incomplete and will not be saved.
+
+    The sources of the modules defining the bases of the recorded
+    objects, and the directives of their grokkers, are remembered in
+    ``dependencies`` with their digests, as they may live outside of the
+    package.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hash = None
+        self.entries = []
+        self.dependencies = {}
+        self.complete = True
+
+    def load(self):
+        """Load the snapshot, returning False if there is no usable one."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (not isinstance(data, dict) or
+                data.get('version') != SNAPSHOT_VERSION or
+                not isinstance(data.get('hash'), str) or
+                not isinstance(data.get('entries'), list) or
+                not isinstance(data.get('dependencies'), dict)):
+            return False
+        self.hash = data['hash']
+        self.entries = data['entries']
+        self.dependencies = data['dependencies']
+        self.complete = True
+        return True
+
+    def is_current(self, current_hash):
+        """Tell whether the snapshot is up to date.
+
+        current_hash is the ``tree_hash()`` of the package and grokker.
+        """
+        if current_hash is None or self.hash != current_hash:
+            return False
+        for path, digest in self.dependencies.items():
+            if _file_digest(path) != digest:
+                return False
+        return True
+
+    def save(self):
+        """Save the snapshot if it is complete. Returns True if saved."""
+        if not self.complete:
+            return False
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': SNAPSHOT_VERSION,
+                       'hash': self.hash,
+                       'entries': self.entries,
+                       'dependencies': self.dependencies}, f)
+        os.replace(tmp_path, self.path)
+        return True
+
+    def _depend_on(self, class_):
+        for path in _module_paths(class_):
+            if path in self.dependencies:
+                continue
+            digest = _file_digest(path)
+            if digest is None:
+                self.complete = False
+                return
+            self.dependencies[path] = digest
+
+    def record(self, module_name, grokker, name, obj, execute=None):
+        if not self.complete:
+            return
+        entry = {'module': module_name, 'name': name}
+        try:
+            entry['grokker'] = _reference(grokker.__class__)
+            if name == module_name and obj is sys.modules.get(module_name):
+                # a global grokker groks the module itself
+                entry['name'] = None
+            elif getattr(sys.modules.get(module_name), name, None) is not obj:
+                raise _Unserializable(obj)
+        except _Unserializable:
+            self.complete = False
+            return
+        # values may be inherited from bases, or computed by directives,
+        # outside of the package
+        self._depend_on(obj if isinstance(obj, type) else type(obj))
+        for bound_directive in directive.bind().get(grokker.__class__):
+            self._depend_on(bound_directive.directive)
+        if (isinstance(execute, partial) and
+                execute.func == grokker.execute and
+                execute.args == (obj,)):
+            try:
+                entry['data'] = {
+                    d.name: _dump(execute.keywords[d.name])
+                    for d in directive.bind().get(grokker.__class__)}
+            except _Unserializable:
+                # grok the object again when replaying
+                pass
+        self.entries.append(entry)
+
+    def resolve(self, grokker, module_infos):
+        """Look up everything needed to replay the snapshot.
+
+        module_infos maps dotted names to module infos. Returns a list of
+        steps to pass to ``execute()``. Raises GrokError if something
+        cannot be looked up, before anything was replayed.
+        """
+        steps = []
+        try:
+            for entry in self.entries:
+                grokker_class = _dereference(entry['grokker'])
+                g = grokker.find(grokker_class)
+                if g is None:
+                    raise GrokError(
+                        "Cannot replay snapshot, %r is not registered." %
+                        grokker_class, None)
+                module_info = module_infos[entry['module']]
+                module = module_info.getModule()
+                name = entry['name']
+                if name is None:
+                    name, obj = entry['module'], module
+                else:
+                    obj = getattr(module, name)
+                data = None
+                if 'data' in entry:
+                    data = {key: _load(value)
+                            for key, value in entry['data'].items()}
+                steps.append((g, name, obj, module_info, data))
+        except GrokError:
+            raise
+        except Exception as e:
+            raise GrokError("Cannot replay snapshot, %s" % e, None)
+        return steps
+
+    def execute(self, steps, **kw):
+        """Replay the steps returned by ``resolve()``."""
+        for g, name, obj, module_info, data in steps:
+            if data is not None:
+                call_kw = dict(kw, module_info=module_info)
+                call_kw.update(data)
+                g.execute(obj, **call_kw)
+            else:
+                g.grok(name, obj, module_info=module_info, **kw)
+
+    def replay(self, grokker, module_infos, **kw):
+        """Redo what was recorded, using the grokkers registered in grokker.
+
+        module_infos maps dotted names to module infos. Nothing is
+        replayed if something cannot be looked up.
+        """
+        self.execute(self.resolve(grokker, module_infos), **kw)
+
+
+def grok_with_snapshot(dotted_name, grokker, path, exclude_filter=None,
+                       ignore_nonsource=True, **kw):
+    """Grok a package, or replay the snapshot at path if it is current.
+
+    The snapshot is current if the sources of the package, the grokkers
+    registered with grokker and their sources, and the sources the
+    recorded objects and directives depend on, are the same as when it
+    was recorded. Replaying imports only the modules that something was
+    grokked from, and resolves no directives. If the snapshot cannot be
+    replayed after all, the package is grokked.
+
+    Returns True if the snapshot was replayed, False if the package was
+    grokked, in which case a new snapshot is saved if possible.
+    """
+    module_info = scan.module_info_from_dotted_name(
+        dotted_name, exclude_filter, ignore_nonsource)
+    module_infos = list(scan.iter_module_infos(module_info))
+    current_hash = tree_hash(module_infos, grokker)
+
+    snapshot = Snapshot(path)
+    if snapshot.load() and snapshot.is_current(current_hash):
+        try:
+            steps = snapshot.resolve(
+                grokker, {info.dotted_name: info for info in module_infos})
+        except GrokError:
+            pass
+        else:
+            snapshot.execute(steps, **kw)
+            return True
+
+    snapshot = Snapshot(path)
+    snapshot.hash = current_hash
+    if (current_hash is None or
+            grokker.prepare is not None or grokker.finalize is not None):
+        # we cannot tell whether it is current, or cannot replay these
+        snapshot.complete = False
+    grokker.recorder = snapshot
+    try:
+        for sub_module_info in module_infos:
+            grok_module(sub_module_info, grokker, **kw)
+    finally:
+        grokker.recorder = None
+    snapshot.save()
+    return False
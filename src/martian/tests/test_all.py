@@ -51,6 +51,27 @@ def test_suite():
         doctest.DocFileSuite('public_methods_from_class.rst',
                              package='martian.tests',
                              optionflags=optionflags),
+        doctest.DocFileSuite('prescan.rst',
+                             package='martian',
+                             optionflags=optionflags),
+        doctest.DocFileSuite('incremental.rst',
+                             package='martian',
+                             optionflags=optionflags),
+        doctest.DocFileSuite('actions.rst',
+                             package='martian',
+                             optionflags=optionflags),
+        doctest.DocFileSuite('snapshot.rst',
+                             package='martian',
+                             optionflags=optionflags),
+        doctest.DocFileSuite('events.rst',
+                             package='martian',
+                             optionflags=optionflags),
+        doctest.DocFileSuite('cooperative.rst',
+                             package='martian',
+                             optionflags=optionflags),
+        doctest.DocFileSuite('lazy.rst',
+                             package='martian',
+                             optionflags=optionflags),
         doctest.DocFileSuite('context.rst',
                              package='martian',
                              globs=globs,
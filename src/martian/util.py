@@ -17,6 +17,7 @@
 import inspect
 import re
 import sys
+from types import ModuleType
 
 from zope import interface
 
@@ -95,34 +96,92 @@ def check_provides_one(obj):
             "(use grok.provides to specify which one to use)." % obj, obj)
 
 
-def scan_for_classes(module, iface):
-    """Given a module, scan for classes.
+def module_contents(module, sort=True, use_all=False):
+    """Iterate over ``(name, obj)`` for the objects defined in a module.
+
+    Objects imported from elsewhere are skipped, as are names containing
+    a dot, which are used by module-level directives. If sort is true
+    the objects come in the order of their names, like with ``dir()``.
+    If use_all is true and the module has an ``__all__``, only the names
+    listed in it are considered.
     """
-    for name in dir(module):
-        if '.' in name:
-            # This must be a module-level variable that couldn't have
-            # been set by the developer.  It must have been a module-level
-            # directive.
+    namespace = getattr(module, '__dict__', None)
+    if namespace is None or '__dir__' in namespace:
+        # the module decides for itself what its attributes are
+        names = dir(module)
+        items = [(name, getattr(module, name)) for name in names
+                 if '.' not in name]
+    else:
+        items = [item for item in namespace.items() if '.' not in item[0]]
+        if sort:
+            items.sort(key=_item_name)
+    if use_all:
+        all_ = getattr(module, '__all__', None)
+        if all_ is not None:
+            all_ = set(all_)
+            items = [item for item in items if item[0] in all_]
+    module_name = module.__name__
+    for name, obj in items:
+        if isinstance(obj, ModuleType):
+            # imported modules are never defined locally
             continue
-        obj = getattr(module, name)
-        if not defined_locally(obj, module.__name__) or not isclass(obj):
+        if not defined_locally(obj, module_name):
+            continue
+        yield name, obj
+
+
+def _item_name(item):
+    return item[0]
+
+
+def scan_for_classes(module, iface, use_all=False):
+    """Given a module, scan for classes.
+    """
+    for name, obj in module_contents(module, use_all=use_all):
+        if not isclass(obj):
             continue
 
         if iface.implementedBy(obj):
             yield obj
 
 
-def methods_from_class(class_):
-    # XXX Problem with zope.interface here that makes us special-case
-    # __provides__.
-    candidates = [getattr(class_, name) for name in dir(class_)
-                  if name != '__provides__']
-    # python3 compatibility need also check of function
-    methods = [c for c in candidates
-               if inspect.ismethod(c) or inspect.isfunction(c)]
+def methods_by_name(class_):
+    """Return ``(name, method)`` pairs for the methods of class_.
+
+    Inherited methods are included. The pairs are sorted by name.
+    """
+    if not isclass(class_):
+        # XXX Problem with zope.interface here that makes us special-case
+        # __provides__.
+        candidates = [(name, getattr(class_, name)) for name in dir(class_)
+                      if name != '__provides__']
+        return [(name, c) for name, c in candidates
+                if inspect.ismethod(c) or inspect.isfunction(c)]
+    # walk the class dictionaries along the MRO rather than looking up
+    # everything dir() gives us; only classmethods and staticmethods need
+    # to be looked up to get what the class gives for them
+    found = {}
+    for base in inspect.getmro(class_):
+        for name, value in vars(base).items():
+            if name not in found:
+                found[name] = value
+    methods = []
+    for name in sorted(found):
+        value = found[name]
+        if isinstance(value, (classmethod, staticmethod)):
+            if name == '__provides__':
+                continue
+            value = getattr(class_, name)
+        # python3 compatibility need also check of function
+        if inspect.ismethod(value) or inspect.isfunction(value):
+            methods.append((name, value))
     return methods
 
 
+def methods_from_class(class_):
+    return [method for name, method in methods_by_name(class_)]
+
+
 def public_methods_from_class(class_):
     return [m for m in methods_from_class(class_)
             if not m.__name__.startswith('_')]